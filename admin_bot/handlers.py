@@ -1,12 +1,14 @@
 import asyncio
 import csv
+import html
+import os
 from aiogram import Router, types, F
 from aiogram.filters import Command
 from aiogram.types import FSInputFile, ReplyKeyboardMarkup, KeyboardButton
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from shared.config import LOG_DIR
-from shared.database import get_all_ads, get_statistics
+from shared.database import iter_all_ads, get_statistics
 from scraper_service.logic import BazarakiScraper
 
 admin_router = Router()
@@ -55,19 +57,31 @@ async def cmd_stop_admin(message: types.Message, scraper: BazarakiScraper, sched
     else:
         await message.answer("🛑 Scraper signaled to stop.", reply_markup=admin_keyboard)
 
+def _tail_lines(path, n: int, block_size: int = 4096) -> str:
+    """Return the last n lines of a file, reading backwards from the end in blocks."""
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        data = b''
+        # n + 1 newlines guarantee n complete lines when the file ends with one
+        while pos > 0 and data.count(b'\n') <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    return b''.join(data.splitlines(keepends=True)[-n:]).decode('utf-8', errors='replace')
+
 @admin_router.message(Command("logs"))
 @admin_router.message(F.text == "📜 View Logs")
 async def cmd_logs(message: types.Message):
     log_file = LOG_DIR / "insightor.log"
     if log_file.exists():
         try:
-            with open(log_file, 'r') as f:
-                lines = f.readlines()
-                last_5 = "".join(lines[-5:])
-                await message.answer(f"Last 5 log lines:\n<pre>{last_5}</pre>", parse_mode="HTML")
+            last_5 = await asyncio.to_thread(_tail_lines, log_file, 5)
+            # Log lines can contain '<' or '&' (tracebacks, URLs), which would break HTML parse mode
+            await message.answer(f"Last 5 log lines:\n<pre>{html.escape(last_5)}</pre>")
             await message.answer_document(FSInputFile(log_file))
         except Exception as e:
-            await message.answer(f"Error reading logs: {e}")
+            await message.answer(f"Error reading logs: {html.escape(str(e))}")
     else:
         await message.answer("No logs found.")
 
@@ -75,19 +89,28 @@ async def cmd_logs(message: types.Message):
 @admin_router.message(F.text == "📥 Download Data")
 async def cmd_database(message: types.Message):
     try:
-        data = await get_all_ads()
-        if data:
-            csv_path = LOG_DIR / "ads_export.csv"
-            keys = data[0].keys()
-            with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=keys)
-                writer.writeheader()
-                writer.writerows(data)
+        csv_path = LOG_DIR / "ads_export.csv"
+        row_count = 0
+        batch = []
+        with open(csv_path, 'w', newline='', encoding='utf-8', buffering=1 << 16) as f:
+            writer = csv.writer(f)
+            async for row in iter_all_ads():
+                if not row_count:
+                    batch.append(row.keys())
+                batch.append(row)
+                row_count += 1
+                # Encode and write in a worker thread so the export doesn't stall the bot's loop
+                if len(batch) >= 1000:
+                    await asyncio.to_thread(writer.writerows, batch)
+                    batch = []
+            if batch:
+                await asyncio.to_thread(writer.writerows, batch)
+        if row_count:
             await message.answer_document(FSInputFile(csv_path))
         else:
             await message.answer("Database is empty.")
     except Exception as e:
-        await message.answer(f"Error exporting database: {e}")
+        await message.answer(f"Error exporting database: {html.escape(str(e))}")
 
 @admin_router.message(F.text == "📊 Statistics")
 async def btn_stats(message: types.Message):
@@ -98,6 +121,6 @@ async def btn_stats(message: types.Message):
             f"Total Ads: {stats['total_ads']}\n"
             f"New in 24h: {stats['new_today']}"
         )
-        await message.answer(text, parse_mode="HTML")
+        await message.answer(text)
     except Exception as e:
-        await message.answer(f"Error fetching stats: {e}")
+        await message.answer(f"Error fetching stats: {html.escape(str(e))}")
@@ -1,5 +1,6 @@
 import logging
 import asyncio
+import html
 import json
 from datetime import datetime
 from aiogram import Router, types, F
@@ -15,13 +16,17 @@ from shared.database import (
     get_user,
     get_user_alerts,
     get_user_followed_ads_paginated,
-    get_user_activities,
     delete_alert,
     delete_all_user_data,
     toggle_alert,
     get_alert,
-    get_ad_history
+    get_ad_history,
+    get_ad,
+    follow_ad,
+    is_ad_followed_by_user
 )
+from shared.utils import format_ad_message
+from shared.activity_db import get_user_activities
 from admin_bot.states import AdminStates
 from admin_bot.handlers import admin_keyboard  # To return to main menu
 
@@ -70,9 +75,9 @@ async def show_users_list(message: types.Message, page: int):
     kb = InlineKeyboardMarkup(inline_keyboard=kb_rows)
     
     if isinstance(message, types.CallbackQuery):
-        await message.message.edit_text(text, reply_markup=kb, parse_mode="HTML")
+        await message.message.edit_text(text, reply_markup=kb)
     else:
-        await message.answer(text, reply_markup=kb, parse_mode="HTML")
+        await message.answer(text, reply_markup=kb)
 
 @user_management_router.callback_query(F.data.startswith("admin_users_page:"))
 async def cb_users_page(callback: types.CallbackQuery):
@@ -84,7 +89,7 @@ async def cb_users_page(callback: types.CallbackQuery):
 
 @user_management_router.callback_query(F.data == "admin_search_user")
 async def cb_search_user(callback: types.CallbackQuery, state: FSMContext):
-    await callback.message.answer("🔎 Send me the <b>User ID</b> or <b>@Username</b>:", parse_mode="HTML")
+    await callback.message.answer("🔎 Send me the <b>User ID</b> or <b>@Username</b>:")
     await state.set_state(AdminStates.waiting_for_user_search)
     await callback.answer()
 
@@ -111,7 +116,7 @@ async def process_search_user(message: types.Message, state: FSMContext):
             kb_rows.append([InlineKeyboardButton(text=f"{u['first_name']} {username}", callback_data=f"admin_user:{u['user_id']}")])
         
         kb = InlineKeyboardMarkup(inline_keyboard=kb_rows)
-        await message.answer(text, reply_markup=kb, parse_mode="HTML")
+        await message.answer(text, reply_markup=kb)
         await state.clear()
 
 # --- USER PROFILE ---
@@ -158,9 +163,9 @@ async def show_user_profile(message: types.Message, user_id: int, is_edit: bool
     ])
 
     if is_edit:
-        await message.edit_text(text, reply_markup=kb, parse_mode="HTML")
+        await message.edit_text(text, reply_markup=kb)
     else:
-        await message.answer(text, reply_markup=kb, parse_mode="HTML")
+        await message.answer(text, reply_markup=kb)
 
 # --- ALERTS MANAGEMENT ---
 
@@ -180,7 +185,7 @@ async def cb_user_alerts(callback: types.CallbackQuery):
     kb_rows.append([InlineKeyboardButton(text="⬅️ Back", callback_data=f"admin_user:{user_id}")])
     kb = InlineKeyboardMarkup(inline_keyboard=kb_rows)
     
-    await callback.message.edit_text(text, reply_markup=kb, parse_mode="HTML")
+    await callback.message.edit_text(text, reply_markup=kb)
     await callback.answer()
 
 @user_management_router.callback_query(F.data.startswith("admin_alert_view:"))
@@ -226,7 +231,6 @@ async def cb_admin_alert_view(callback: types.CallbackQuery):
     
     filter_text = "\n".join(filter_lines) if filter_lines else "No specific filters."
     
-    import html
     safe_name = html.escape(alert['name'])
     status_icon = "✅" if alert['is_active'] else "zzz"
     text = (
@@ -241,7 +245,7 @@ async def cb_admin_alert_view(callback: types.CallbackQuery):
         [InlineKeyboardButton(text="🗑 Delete Alert", callback_data=f"admin_alert_del:{alert_id}:{user_id}")],
         [InlineKeyboardButton(text="⬅️ Back", callback_data=f"admin_u_alerts:{user_id}")]
     ])
-    await callback.message.edit_text(text, reply_markup=kb, parse_mode="HTML")
+    await callback.message.edit_text(text, reply_markup=kb)
     await callback.answer()
 
 @user_management_router.callback_query(F.data.startswith("admin_alert_del:"))
@@ -274,15 +278,13 @@ async def cb_user_favs(callback: types.CallbackQuery):
     kb_rows.append([InlineKeyboardButton(text="⬅️ Back", callback_data=f"admin_user:{user_id}")])
     kb = InlineKeyboardMarkup(inline_keyboard=kb_rows)
     
-    await callback.message.edit_text(text, reply_markup=kb, parse_mode="HTML")
+    await callback.message.edit_text(text, reply_markup=kb)
     await callback.answer()
 
 @user_management_router.callback_query(F.data.startswith("admin_fav_view:"))
 async def cb_admin_fav_view(callback: types.CallbackQuery):
     _, ad_id, user_id = callback.data.split(":")
     
-    from shared.utils import format_ad_message
-    from shared.database import get_ad
     
     ad = await get_ad(ad_id)
     history = await get_ad_history(ad_id)
@@ -304,13 +306,12 @@ async def cb_admin_fav_view(callback: types.CallbackQuery):
     # Filter out None buttons
     kb.inline_keyboard = [row for row in kb.inline_keyboard if any(row)]
     
-    await callback.message.edit_text(text, reply_markup=kb, parse_mode="HTML")
+    await callback.message.edit_text(text, reply_markup=kb)
     await callback.answer()
 
 @user_management_router.callback_query(F.data.startswith("admin_fav_del:"))
 async def cb_admin_fav_del(callback: types.CallbackQuery):
     _, ad_id, user_id = callback.data.split(":")
-    from shared.database import follow_ad, is_ad_followed_by_user
     
     # Check if followed
     if await is_ad_followed_by_user(int(user_id), ad_id):
@@ -332,7 +333,7 @@ async def cb_clear_ask(callback: types.CallbackQuery):
         [InlineKeyboardButton(text="✅ Yes, Delete All", callback_data=f"admin_u_clear_confirm:{user_id}")],
         [InlineKeyboardButton(text="❌ Cancel", callback_data=f"admin_user:{user_id}")]
     ])
-    await callback.message.edit_text(text, reply_markup=kb, parse_mode="HTML")
+    await callback.message.edit_text(text, reply_markup=kb)
     await callback.answer()
 
 @user_management_router.callback_query(F.data.startswith("admin_u_clear_confirm:"))
@@ -361,5 +362,5 @@ async def cb_user_logs(callback: types.CallbackQuery):
     kb = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="⬅️ Back", callback_data=f"admin_user:{user_id}")]
     ])
-    await callback.message.edit_text(text, reply_markup=kb, parse_mode="HTML")
+    await callback.message.edit_text(text, reply_markup=kb)
     await callback.answer()
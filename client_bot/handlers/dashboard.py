@@ -24,7 +24,7 @@ async def return_to_dashboard(message: types.Message, state: FSMContext):
     kb = get_dashboard_kb(filters)
     
     await state.set_state(AlertEditor.Menu)
-    await message.answer("➕ <b>New Alert Wizard</b>", reply_markup=kb, parse_mode="HTML")
+    await message.answer("➕ <b>New Alert Wizard</b>", reply_markup=kb)
 
 @router.callback_query(F.data == "dash_cancel", StateFilter(AlertEditor))
 async def dash_cancel(callback: CallbackQuery, state: FSMContext):
@@ -63,8 +63,7 @@ async def dash_save(callback: CallbackQuery, state: FSMContext):
 
     await callback.message.answer(
         f"{msg_title}\n(You can manage it in 'My Alerts')",
-        reply_markup=get_main_menu_kb(alerts_cnt, fav_cnt),
-        parse_mode="HTML"
+        reply_markup=get_main_menu_kb(alerts_cnt, fav_cnt)
     )
     
     wait_msg = await callback.message.answer("🔎 Searching recent matches...")
@@ -101,9 +100,9 @@ async def dash_save(callback: CallbackQuery, state: FSMContext):
                     ]
                     kb = InlineKeyboardMarkup(inline_keyboard=buttons)
                     
-                    await callback.message.answer(final_text, parse_mode="HTML", reply_markup=kb)
+                    await callback.message.answer(final_text, reply_markup=kb)
             except Exception as e:
-                logger.error(f"Failed to send match {ad.get('ad_id')}: {e}")
+                logger.error("Failed to send match %s: %s", ad.get('ad_id'), e)
     else:
         await callback.message.answer("ℹ️ No recent matches found.")
 
@@ -123,7 +122,7 @@ async def edit_field_start(callback: CallbackQuery, state: FSMContext):
         builder.button(text="🔙 Back", callback_data="dash_back")
         builder.adjust(1)
         
-        await callback.message.edit_text(prompt, reply_markup=builder.as_markup(), parse_mode="HTML")
+        await callback.message.edit_text(prompt, reply_markup=builder.as_markup())
     
     elif field in selection_fields:
         await start_selection(callback, state, field)
@@ -141,7 +140,7 @@ async def process_any_button(callback: CallbackQuery, state: FSMContext):
     # Since we are in callback, better to edit usage
     kb = get_dashboard_kb(filters)
     await state.set_state(AlertEditor.Menu)
-    await callback.message.edit_text("➕ <b>New Alert Wizard</b>", reply_markup=kb, parse_mode="HTML")
+    await callback.message.edit_text("➕ <b>New Alert Wizard</b>", reply_markup=kb)
 
 @router.callback_query(F.data == "dash_back")
 async def process_dash_back(callback: CallbackQuery, state: FSMContext):
@@ -149,7 +148,7 @@ async def process_dash_back(callback: CallbackQuery, state: FSMContext):
     filters = data.get('filters', {})
     kb = get_dashboard_kb(filters)
     await state.set_state(AlertEditor.Menu)
-    await callback.message.edit_text("➕ <b>New Alert Wizard</b>", reply_markup=kb, parse_mode="HTML")
+    await callback.message.edit_text("➕ <b>New Alert Wizard</b>", reply_markup=kb)
 
 @router.message(AlertEditor.InputText)
 async def process_dashboard_text(message: types.Message, state: FSMContext):
@@ -226,7 +225,7 @@ async def start_selection(callback: CallbackQuery, state: FSMContext, field: str
     if nav_row: builder.row(*nav_row)
     builder.row(InlineKeyboardButton(text="🔙 Back to Dashboard", callback_data="dash_back"))
     
-    await callback.message.edit_text(f"Select <b>{field.title()}</b>:", reply_markup=builder.as_markup(), parse_mode="HTML")
+    await callback.message.edit_text(f"Select <b>{field.title()}</b>:", reply_markup=builder.as_markup())
 
 @router.callback_query(F.data.startswith("pg:"))
 async def process_pagination(callback: CallbackQuery, state: FSMContext):
@@ -252,4 +251,4 @@ async def process_selection(callback: CallbackQuery, state: FSMContext):
     
     kb = get_dashboard_kb(filters)
     await state.set_state(AlertEditor.Menu)
-    await callback.message.edit_text("➕ <b>New Alert Wizard</b>", reply_markup=kb, parse_mode="HTML")
+    await callback.message.edit_text("➕ <b>New Alert Wizard</b>", reply_markup=kb)
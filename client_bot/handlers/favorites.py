@@ -21,6 +21,9 @@ router = Router()
 
 ITEMS_PER_PAGE = 5
 
+# Strips everything but digits from one "|"-separated price fragment
+_NON_DIGITS_RE = re.compile(r"\D+")
+
 async def show_favorites_page(message_or_callback: types.Message | CallbackQuery, user_id: int, page: int = 0, is_edit: bool = False):
     total_count = await get_user_followed_ads_count(user_id)
     if total_count == 0:
@@ -73,12 +76,12 @@ async def show_favorites_page(message_or_callback: types.Message | CallbackQuery
     text = f"⭐ <b>Favorites ({total_count})</b>\nSelect an ad to view details:"
     
     if is_edit and isinstance(message_or_callback, CallbackQuery):
-        await message_or_callback.message.edit_text(text, reply_markup=markup, parse_mode="HTML")
+        await message_or_callback.message.edit_text(text, reply_markup=markup)
     elif isinstance(message_or_callback, types.Message):
-        await message_or_callback.answer(text, reply_markup=markup, parse_mode="HTML")
+        await message_or_callback.answer(text, reply_markup=markup)
     elif isinstance(message_or_callback, CallbackQuery):
         # Should be is_edit=True usually
-        await message_or_callback.message.answer(text, reply_markup=markup, parse_mode="HTML")
+        await message_or_callback.message.answer(text, reply_markup=markup)
 
 @router.message(F.text == "⭐ Favorites")
 async def cmd_favorites(message: types.Message):
@@ -130,7 +133,7 @@ async def on_fav_detail(callback: CallbackQuery):
     ]
     markup = InlineKeyboardMarkup(inline_keyboard=buttons)
     
-    await callback.message.edit_text(text, parse_mode="HTML", reply_markup=markup)
+    await callback.message.edit_text(text, reply_markup=markup)
     await callback.answer()
 
 @router.callback_query(F.data == "fav_add_url")
@@ -141,8 +144,7 @@ async def on_fav_add_url(callback: CallbackQuery, state: FSMContext):
         "🔗 <b>Add Ad by URL</b>\n\n"
         "Please paste the Bazaraki ad link.\n"
         "Example: <code>https://www.bazaraki.com/adv/1234567_slug/</code>\n\n"
-        "Type /cancel to cancel.",
-        parse_mode="HTML"
+        "Type /cancel to cancel."
     )
     await callback.answer()
 
@@ -157,7 +159,7 @@ async def process_fav_url_input(message: types.Message, state: FSMContext, scrap
         
     # Validation
     if "bazaraki.com/adv/" not in url:
-         await message.answer("❌ Invalid link.\nMust contain <code>bazaraki.com/adv/</code>.\nTry again or /cancel.", parse_mode="HTML")
+         await message.answer("❌ Invalid link.\nMust contain <code>bazaraki.com/adv/</code>.\nTry again or /cancel.")
          return
     
     try:
@@ -182,7 +184,7 @@ async def process_fav_url_input(message: types.Message, state: FSMContext, scrap
                  history = await get_ad_history(ad_id, limit=5)
                  text = format_ad_message(ad, 'detailed', history)
                  buttons = [[InlineKeyboardButton(text="Unfollow", callback_data=f"toggle_follow:{ad_id}")]]
-                 await message.answer(text, parse_mode="HTML", reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons))
+                 await message.answer(text, reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons))
             await state.clear()
             return
             
@@ -256,7 +258,7 @@ async def process_fav_url_input(message: types.Message, state: FSMContext, scrap
         price_tag = soup.find(class_='advert__content-price') or soup.find('div', class_='price') or soup.find(class_='announcement-price__cost')
         if price_tag:
              text = price_tag.get_text(separator='|', strip=True)
-             nums = [int(''.join(filter(str.isdigit, p))) for p in text.split('|') if any(c.isdigit() for c in p)]
+             nums = [int(d) for d in (_NON_DIGITS_RE.sub('', p) for p in text.split('|')) if d]
              if nums: price = nums[0]
              
         # Status?
@@ -303,10 +305,10 @@ async def process_fav_url_input(message: types.Message, state: FSMContext, scrap
             [InlineKeyboardButton(text="🔙 Back to List", callback_data="fav_close")]
         ]
         
-        await status_msg.edit_text(text, parse_mode="HTML", reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons))
+        await status_msg.edit_text(text, reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons))
         await state.clear()
         
     except Exception as e:
-        logger.error(f"Error adding fav url: {e}")
+        logger.error("Error adding fav url: %s", e)
         await message.answer("❌ Error processing link.")
         await state.clear()
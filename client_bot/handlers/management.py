@@ -1,4 +1,5 @@
 
+import html
 import logging
 import json
 from aiogram import Router, types, F
@@ -9,7 +10,8 @@ from aiogram.utils.keyboard import ReplyKeyboardBuilder
 
 from shared.database import (
     get_user_alerts, get_alert, toggle_alert, delete_alert, rename_alert, get_latest_matching_ads,
-    follow_ad, get_ad, get_ad_history
+    follow_ad, get_ad, get_ad_history, get_user_alerts_count, get_user_followed_ads_count,
+    get_all_followed_ads_by_user
 )
 from shared.utils import format_ad_message
 from client_bot.states import AlertManagement, AlertEditor
@@ -34,7 +36,6 @@ async def show_alert_list(message: types.Message, state: FSMContext):
     
     if not alerts:
         # Fetch counts (fav might be > 0 even if alerts is 0)
-        from shared.database import get_user_alerts_count, get_user_followed_ads_count
         alerts_cnt = await get_user_alerts_count(user_id)
         fav_cnt = await get_user_followed_ads_count(user_id)
         
@@ -63,7 +64,6 @@ async def process_alert_selection(message: types.Message, state: FSMContext):
         await state.clear()
         
         # Fetch counts for proper menu
-        from shared.database import get_user_alerts_count, get_user_followed_ads_count
         user_id = message.from_user.id
         alerts_cnt = await get_user_alerts_count(user_id)
         fav_cnt = await get_user_followed_ads_count(user_id)
@@ -99,7 +99,7 @@ async def process_alert_selection(message: types.Message, state: FSMContext):
              details.append(f"Seller Type: {val}")
         elif v: 
              details.append(f"{k}: {v}")
-    details_str = "\n".join(details)
+    details_str = html.escape("\n".join(details))
     
     await state.update_data(current_alert_id=alert['alert_id'])
     await state.set_state(AlertManagement.ViewingDetail)
@@ -111,9 +111,8 @@ async def process_alert_selection(message: types.Message, state: FSMContext):
         [KeyboardButton(text="⬅️ Back"), KeyboardButton(text="🏠 Main Menu")]
     ], resize_keyboard=True)
     
-    import html
     safe_name = html.escape(alert['name'])
-    await message.answer(f"📋 <b>Alert: {safe_name}</b>\n{details_str}", reply_markup=kb, parse_mode="HTML")
+    await message.answer(f"📋 <b>Alert: {safe_name}</b>\n{details_str}", reply_markup=kb)
 
 @router.message(AlertManagement.ViewingDetail)
 async def process_alert_action(message: types.Message, state: FSMContext):
@@ -130,7 +129,6 @@ async def process_alert_action(message: types.Message, state: FSMContext):
         await state.clear()
         
         # Fetch counts for proper menu
-        from shared.database import get_user_alerts_count, get_user_followed_ads_count
         alerts_cnt = await get_user_alerts_count(user_id)
         fav_cnt = await get_user_followed_ads_count(user_id)
         
@@ -156,7 +154,6 @@ async def process_alert_action(message: types.Message, state: FSMContext):
                          await msg.edit_text(f"🔎 Found {len(matches)} recent matches:")
                          
                          # Pre-fetch followed status
-                         from shared.database import get_all_followed_ads_by_user
                          followed_ads = await get_all_followed_ads_by_user(user_id)
 
                          for ad in matches:
@@ -164,7 +161,6 @@ async def process_alert_action(message: types.Message, state: FSMContext):
                                  t = format_ad_message(ad, 'new')
                                  if t:
                                      # Prepend Alert Name
-                                     import html
                                      safe_alert_name = html.escape(alert['name'])
                                      final_t = f"🔔 <b>{safe_alert_name}</b>\n\n{t}"
                                      
@@ -182,14 +178,14 @@ async def process_alert_action(message: types.Message, state: FSMContext):
                                      ]
                                      kb = InlineKeyboardMarkup(inline_keyboard=buttons)
                                      
-                                     await message.answer(final_t, parse_mode="HTML", reply_markup=kb)
+                                     await message.answer(final_t, reply_markup=kb)
                              except Exception as e:
-                                 logger.error(f"Failed to send match {ad.get('ad_id')}: {e}")
+                                 logger.error("Failed to send match %s: %s", ad.get('ad_id'), e)
                          
                          # We do NOT delete the "Found matches" message, as it serves as a header/summary.
 
                  except Exception as e:
-                     logger.error(f"Error fetching matches for alert {alert_id}: {e}")
+                     logger.error("Error fetching matches for alert %s: %s", alert_id, e)
                      await msg.edit_text("✅ Alert Activated. (Error fetching matches)")
 
         await show_alert_list(message, state)
@@ -209,7 +205,7 @@ async def process_alert_action(message: types.Message, state: FSMContext):
              # We need to tell the state which alert we are editing
              await state.update_data(filters=filters, editing_alert_id=alert_id)
              kb = get_dashboard_kb(filters)
-             await message.answer("🛠 <b>Editing Alert</b>", reply_markup=kb, parse_mode="HTML")
+             await message.answer("🛠 <b>Editing Alert</b>", reply_markup=kb)
         return
 
     if text == "✏️ Rename":
@@ -231,7 +227,7 @@ async def process_rename(message: types.Message, state: FSMContext):
          return
 
     await rename_alert(alert_id, user_id, name)
-    await message.answer(f"✅ Renamed to '{name}'.")
+    await message.answer(f"✅ Renamed to '{html.escape(name)}'.")
     
     await show_alert_list(message, state)
 
@@ -275,7 +271,7 @@ async def process_toggle_alert_callback(callback: CallbackQuery):
         await callback.answer(f"Alert {status_text}.")
         
     except Exception as e:
-        logger.error(f"Callback toggle error: {e}")
+        logger.error("Callback toggle error: %s", e)
         await callback.answer("Error updating alert.", show_alert=True)
 
 @router.callback_query(F.data.startswith("toggle_follow:"))
@@ -315,7 +311,7 @@ async def process_toggle_follow_callback(callback: CallbackQuery):
         await callback.answer(f"Ad {status_text}.")
         
     except Exception as e:
-        logger.error(f"Callback follow error: {e}")
+        logger.error("Callback follow error: %s", e)
         await callback.answer("Error updating follow status.", show_alert=True)
 
 @router.callback_query(F.data.startswith("more_details:"))
@@ -350,13 +346,13 @@ async def process_more_details(callback: CallbackQuery):
                 if new_rows:
                     new_kb = InlineKeyboardMarkup(inline_keyboard=new_rows)
 
-            await callback.message.edit_text(text, parse_mode="HTML", reply_markup=new_kb)
+            await callback.message.edit_text(text, reply_markup=new_kb)
         except Exception:
             # Fallback: send as new message if edit fails (e.g. too old)
-            await callback.message.answer(text, parse_mode="HTML")
+            await callback.message.answer(text)
             
         await callback.answer()
         
     except Exception as e:
-        logger.error(f"More details error: {e}")
+        logger.error("More details error: %s", e)
         await callback.answer("Error fetching details.", show_alert=True)
@@ -1,3 +1,5 @@
+import asyncio
+import html
 import logging
 import difflib
 from aiogram import Router, types, F
@@ -8,30 +10,49 @@ from aiogram.types import ReplyKeyboardRemove
 from shared.constants import MAX_ALERTS_BASIC
 from shared.database import (
     get_user, add_or_update_user, get_active_alerts_count_by_user,
-    get_distinct_values, get_min_max_values
+    get_distinct_values, get_min_max_values, get_user_alerts_count, get_user_followed_ads_count
 )
 from client_bot.states import AlertCreation, AlertEditor
-from client_bot.keyboards import get_dashboard_kb, get_nav_kb
+from client_bot.keyboards import get_dashboard_kb, get_nav_kb, get_main_menu_kb
 # Note: Cyclic import avoidance - we import common parts or just needed keyboards
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+# Longest numeric input accepted by the wizard (covers years and prices)
+_MAX_NUMBER_LEN = 7
+
+def _parse_number(text: str) -> int | None:
+    """Parse a non-negative integer from wizard input (ASCII digits only), or None if it isn't one."""
+    # int() alone would also take signs, underscores and non-ASCII digits
+    if len(text) > _MAX_NUMBER_LEN or not (text.isascii() and text.isdigit()):
+        return None
+    return int(text)
+
+async def _set_filter(state: FSMContext, key: str, value) -> dict:
+    """Set one wizard filter, skipping the FSM write when the value is unchanged."""
+    data = await state.get_data()
+    filters = data.get('filters', {})
+    if key in filters and filters[key] == value:
+        return filters
+    filters[key] = value
+    await state.update_data(filters=filters)
+    return filters
+
 @router.message(F.text == "🔔 New Alert", StateFilter("*"))
 async def start_new_alert(message: types.Message, state: FSMContext):
-    # Check if user exists
-    user = await get_user(message.from_user.id)
+    # Check if user exists and count active alerts (independent reads, run concurrently)
+    user, active_count = await asyncio.gather(
+        get_user(message.from_user.id),
+        get_active_alerts_count_by_user(message.from_user.id)
+    )
     if not user:
         await add_or_update_user(message.from_user.id, message.from_user.username, message.from_user.first_name)
     
-    # Check active alerts
-    active_count = await get_active_alerts_count_by_user(message.from_user.id)
-    
     if active_count >= MAX_ALERTS_BASIC:
         await message.answer(
              f"🚫 <b>Alerts limit reached ({active_count}/{MAX_ALERTS_BASIC} active).</b>\n\n"
-             "Deactivate one in '🗂️ My Alerts', or upgrade to <b>🎖️ Pro</b>.",
-             parse_mode="HTML"
+             "Deactivate one in '🗂️ My Alerts', or upgrade to <b>🎖️ Pro</b>."
         )
         return
 
@@ -45,10 +66,10 @@ async def start_new_alert(message: types.Message, state: FSMContext):
     await state.set_state(AlertEditor.Menu)
     
     kb = get_dashboard_kb({})
-    # Remove existing Reply Keyboard to prevent confusion
-    loading_msg = await message.answer("🔄 Loading...", reply_markup=ReplyKeyboardRemove())
-    await loading_msg.delete()
-    await message.answer("➕ <b>New Alert Wizard</b>\n\nSelect a filter to edit:", reply_markup=kb, parse_mode="HTML")
+    # Remove existing Reply Keyboard with the header itself (a message carries one markup,
+    # so the inline dashboard follows in a second message; no throwaway send + delete)
+    await message.answer("➕ <b>New Alert Wizard</b>", reply_markup=ReplyKeyboardRemove())
+    await message.answer("Select a filter to edit:", reply_markup=kb)
 
 # --- Wizard Steps (optional flow if accessed otherwise, or fallback) ---
 # Keeping existing logic for linear wizard just in case we re-enable it or user hits back to it
@@ -61,10 +82,6 @@ async def process_brand(message: types.Message, state: FSMContext):
     
     if text == "⬅️ Back":
         # Back from Brand goes to Main Menu (Cancelled) in original logic
-        # We need get_main_menu_kb. Import here to avoid cycle at top if needed, 
-        # but utils should be fine.
-        from client_bot.keyboards import get_main_menu_kb
-        from shared.database import get_user_alerts_count, get_user_followed_ads_count
         user_id = message.from_user.id
         alerts_cnt = await get_user_alerts_count(user_id)
         fav_cnt = await get_user_followed_ads_count(user_id)
@@ -77,20 +94,24 @@ async def process_brand(message: types.Message, state: FSMContext):
         await message.answer("Please finish the basic setup first or select ANY for remaining fields.")
         return
 
-    # Validate Brand against DB
-    brands = await get_distinct_values('car_brand')
-    
     final_brand = text
     if text != "ANY":
-        # Check exact (case insensitive)
-        match = next((b for b in brands if b.lower() == text.lower()), None)
+        # Obvious non-brands never reach the DB or the fuzzy matcher
+        if len(text) < 2 or text.isdigit():
+            await message.answer("Please type a valid brand name.")
+            return
+
+        # Validate Brand against DB: exact (case insensitive) lookup first
+        brands = await get_distinct_values('car_brand')
+        brands_by_lower = {b.lower(): b for b in brands}
+        match = brands_by_lower.get(text.lower())
         
         if not match:
              # Fuzzy search
              possibilities = difflib.get_close_matches(text, brands, n=3, cutoff=0.4)
-             msg = f"❌ Brand '{text}' not found."
+             msg = f"❌ Brand '{html.escape(text)}' not found."
              if possibilities:
-                 msg += f"\nDid you mean: {', '.join(possibilities)}?"
+                 msg += f"\nDid you mean: {html.escape(', '.join(possibilities))}?"
              else:
                  msg += "\nPlease type the full brand name or select ANY."
              await message.answer(msg)
@@ -98,10 +119,7 @@ async def process_brand(message: types.Message, state: FSMContext):
              
         final_brand = match
 
-    data = await state.get_data()
-    filters = data.get('filters', {})
-    filters['brand'] = final_brand if final_brand != "ANY" else None
-    await state.update_data(filters=filters)
+    await _set_filter(state, 'brand', final_brand if final_brand != "ANY" else None)
     
     if final_brand == "ANY":
         await state.update_data(model=None) 
@@ -113,11 +131,10 @@ async def process_brand(message: types.Message, state: FSMContext):
         )
     else:
         await state.set_state(AlertCreation.Model)
-        models = await get_distinct_values('car_model', 'car_brand', final_brand)
-        chunked_models = models[:30]
+        models = await get_distinct_values('car_model', 'car_brand', final_brand, limit=30)
         await message.answer(
-            f"Step 2: Model for {final_brand}\nSelect or type model.",
-            reply_markup=get_nav_kb(options=chunked_models, include_any=True)
+            f"Step 2: Model for {html.escape(final_brand)}\nSelect or type model.",
+            reply_markup=get_nav_kb(options=models, include_any=True)
         )
 
 @router.message(AlertCreation.Model)
@@ -129,12 +146,8 @@ async def process_model(message: types.Message, state: FSMContext):
         await message.answer("Step 1: Brand", reply_markup=get_nav_kb(include_any=True))
         return
 
-    data = await state.get_data()
-    filters = data.get('filters', {})
-
     models_val = [m.strip() for m in text.split(',')] if text != "ANY" else None
-    filters['model'] = models_val
-    await state.update_data(filters=filters)
+    await _set_filter(state, 'model', models_val)
 
     await state.set_state(AlertCreation.YearFrom)
     min_y, _ = await get_min_max_values('car_year')
@@ -153,8 +166,8 @@ async def process_year_from(message: types.Message, state: FSMContext):
              if 'model' in data.get('filters', {}) and data.get('filters')['brand']:
                  await state.set_state(AlertCreation.Model)
                  brand = data['filters']['brand']
-                 models = await get_distinct_values('car_model', 'car_brand', brand)
-                 await message.answer(f"Step 2: Model for {brand}", reply_markup=get_nav_kb(options=models[:30], include_any=True))
+                 models = await get_distinct_values('car_model', 'car_brand', brand, limit=30)
+                 await message.answer(f"Step 2: Model for {html.escape(brand)}", reply_markup=get_nav_kb(options=models, include_any=True))
              else:
                  await state.set_state(AlertCreation.Brand)
                  await message.answer("Step 1: Brand", reply_markup=get_nav_kb(include_any=True))
@@ -165,15 +178,12 @@ async def process_year_from(message: types.Message, state: FSMContext):
 
     val = None
     if text != "ANY":
-        if not text.isdigit():
+        val = _parse_number(text)
+        if val is None:
             await message.answer("Please enter a valid year (YYYY).")
             return
-        val = int(text)
 
-    data = await state.get_data()
-    filters = data.get('filters', {})
-    filters['year_min'] = val
-    await state.update_data(filters=filters)
+    await _set_filter(state, 'year_min', val)
 
     await state.set_state(AlertCreation.YearTo)
     await message.answer("Step 4: Year To", reply_markup=get_nav_kb(include_any=True))
@@ -189,15 +199,12 @@ async def process_year_to(message: types.Message, state: FSMContext):
 
     val = None
     if text != "ANY":
-        if not text.isdigit():
+        val = _parse_number(text)
+        if val is None:
             await message.answer("Please enter a valid year.")
             return
-        val = int(text)
         
-    data = await state.get_data()
-    filters = data.get('filters', {})
-    filters['year_max'] = val
-    await state.update_data(filters=filters)
+    await _set_filter(state, 'year_max', val)
 
     await state.set_state(AlertCreation.PriceMax)
     _, max_p = await get_min_max_values('current_price')
@@ -213,26 +220,20 @@ async def process_price_max(message: types.Message, state: FSMContext):
 
     val = None
     if text != "ANY":
-        if not text.isdigit():
+        val = _parse_number(text)
+        if val is None:
              await message.answer("Please enter a valid price.")
              return
-        val = int(text)
 
-    data = await state.get_data()
-    filters = data.get('filters', {})
-    filters['price_max'] = val
-    await state.update_data(filters=filters)
+    filters = await _set_filter(state, 'price_max', val)
 
     # End of basic wizard -> Show Dashboard
     kb = get_dashboard_kb(filters)
     
     await state.set_state(AlertEditor.Menu)
     
-    msg_load = await message.answer("🔄 Finalizing Wizard...", reply_markup=ReplyKeyboardRemove())
-    await msg_load.delete()
+    await message.answer("✅ <b>Basic Setup Complete!</b>", reply_markup=ReplyKeyboardRemove())
     await message.answer(
-        "✅ <b>Basic Setup Complete!</b>\n\n"
         "Review your settings below. You can refine them (e.g. Fuel, Gearbox) or click Activate.", 
-        reply_markup=kb, 
-        parse_mode="HTML"
+        reply_markup=kb
     )
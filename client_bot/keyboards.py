@@ -1,7 +1,18 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import ReplyKeyboardBuilder, InlineKeyboardBuilder
 
-def get_main_menu_kb(alerts_count: int = 0, favorites_count: int = 0):
+# Fixed wizard control buttons, built once and reused by every keyboard
+_BACK_BTN = KeyboardButton(text="⬅️ Back")
+_SAVE_BTN = KeyboardButton(text="💾 Save & Finish")
+_CANCEL_BTN = KeyboardButton(text="❌ Cancel")
+_ANY_ROW = [KeyboardButton(text="ANY")]
+_CONTROL_ROW = [_BACK_BTN, _SAVE_BTN, _CANCEL_BTN]
+
+def _chunk(items: list, n: int) -> list[list]:
+    """Split a flat list into rows of n items."""
+    return [items[i:i + n] for i in range(0, len(items), n)]
+
+def _build_main_menu_kb(alerts_count: int) -> ReplyKeyboardMarkup:
     buttons = []
     
     # 1. New Alert vs My Alerts
@@ -21,45 +32,23 @@ def get_main_menu_kb(alerts_count: int = 0, favorites_count: int = 0):
     buttons.append(KeyboardButton(text="🎖️ Pro"))
 
     # Chunk into rows of 2
-    keyboard = []
-    row = []
-    for btn in buttons:
-        row.append(btn)
-        if len(row) == 2:
-            keyboard.append(row)
-            row = []
-    if row:
-        keyboard.append(row)
+    return ReplyKeyboardMarkup(keyboard=_chunk(buttons, 2), resize_keyboard=True)
 
-    return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
+# The menu only varies on whether the user has alerts, so both variants are built once
+_MAIN_MENU_NO_ALERTS = _build_main_menu_kb(0)
+_MAIN_MENU_WITH_ALERTS = _build_main_menu_kb(1)
+
+def get_main_menu_kb(alerts_count: int = 0, favorites_count: int = 0):
+    return _MAIN_MENU_NO_ALERTS if alerts_count == 0 else _MAIN_MENU_WITH_ALERTS
 
 def get_nav_kb(options: list[str] | None = None, include_any: bool = True):
     """
     Helper to create keyboards dynamically.
     options: List of main option buttons (e.g. ["Automatic", "Manual"])
     """
-    kb = []
-    if options:
-        # Group options into rows of 2 or 3
-        row = []
-        for opt in options:
-            row.append(KeyboardButton(text=opt))
-            if len(row) == 2:
-                kb.append(row)
-                row = []
-        if row:
-            kb.append(row)
-    
-    if include_any:
-        kb.insert(0, [KeyboardButton(text="ANY")])
-
-    # Control Row
-    control_row = [
-        KeyboardButton(text="⬅️ Back"),
-        KeyboardButton(text="💾 Save & Finish"),
-        KeyboardButton(text="❌ Cancel")
-    ]
-    kb.append(control_row)
+    # Group options into rows of 2, framed by the shared ANY and control rows
+    option_rows = _chunk([KeyboardButton(text=opt) for opt in options], 2) if options else []
+    kb = ([_ANY_ROW] if include_any else []) + option_rows + [_CONTROL_ROW]
     return ReplyKeyboardMarkup(keyboard=kb, resize_keyboard=True)
 
 def get_dashboard_kb(filters: dict) -> InlineKeyboardMarkup:
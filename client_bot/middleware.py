@@ -1,8 +1,35 @@
-from typing import Any, Callable, Dict, Awaitable
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Awaitable, Optional
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery, TelegramObject
 
-from shared.database import log_user_activity
+from shared.activity_db import log_user_activities
+
+logger = logging.getLogger(__name__)
+
+# Pending (user_id, action, timestamp) records, flushed by the background writer.
+# Bounded so a stalled DB can't grow memory; overflow entries are dropped.
+_LOG_Q: asyncio.Queue = asyncio.Queue(maxsize=1000)
+_log_worker: Optional[asyncio.Task] = None
+
+async def _activity_log_worker() -> None:
+    """Drain the activity queue and write whatever has accumulated as one batch."""
+    while True:
+        batch = [await _LOG_Q.get()]
+        while not _LOG_Q.empty():
+            batch.append(_LOG_Q.get_nowait())
+        try:
+            await log_user_activities(batch)
+        except Exception as e:
+            logger.warning("Failed to write %s activity logs: %s", len(batch), e)
+
+def start_activity_logger() -> None:
+    """Start the background activity writer (idempotent)."""
+    global _log_worker
+    if _log_worker is None or _log_worker.done():
+        _log_worker = asyncio.create_task(_activity_log_worker())
 
 class UserActivityMiddleware(BaseMiddleware):
     async def __call__(
@@ -11,26 +38,20 @@ class UserActivityMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any]
     ) -> Any:
-        
+
         user_id = None
         action = None
-        
+
         if isinstance(event, Message):
             user_id = event.from_user.id
             action = f"message: {event.text[:50] if event.text else 'content_type=' + event.content_type}"
-            
+
         elif isinstance(event, CallbackQuery):
             user_id = event.from_user.id
             action = f"callback: {event.data}"
-            
-        if user_id:
-            # Fire and forget logging to avoid blocking response
-            # Note: In production we might want to use background task, 
-            # but log_user_activity is async and fast, so awaiting it is fine for now.
-            try:
-                await log_user_activity(user_id, action)
-            except Exception as e:
-                # Don't fail the request if logging fails
-                pass
+
+        if user_id and not _LOG_Q.full():
+            # Enqueue only; the DB write happens in the background worker
+            _LOG_Q.put_nowait((user_id, action, datetime.now()))
 
         return await handler(event, data)
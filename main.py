@@ -1,47 +1,99 @@
 import asyncio
+import atexit
+import functools
+import gzip
+import html
 import logging
+import os
+import queue
+import shutil
 import sys
-import json
 from datetime import datetime, timedelta
-from logging.handlers import RotatingFileHandler
-from typing import List, Dict, Any
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import List, Dict, Any, Optional
 
 from aiogram import Bot, Dispatcher, BaseMiddleware
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, BotCommand
 from aiogram.exceptions import TelegramNetworkError, TelegramConflictError
 from aiohttp.client_exceptions import ClientConnectorError, ClientOSError
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from shared.config import BOT_TOKEN, USER_BOT_TOKEN, ADMIN_ID, CHANNEL_ID, LOG_DIR
-from shared.database import init_db, get_active_alerts, get_ad_followers, get_ad_history
-from shared.utils import format_ad_message, is_match
+from shared.activity_db import init_activity_db, close_activity_db
+from shared.database import (
+    AlertIndex, init_db, close_db, checkpoint_wal, get_active_alerts, index_alerts, candidate_alerts,
+    get_alert_matcher, get_ad_followers, get_ad_history
+)
+from shared.rate_limiter import send_message
+from shared.utils import format_ad_message
 
 from scraper_service.logic import BazarakiScraper
 from client_bot.handlers import user_router
 from admin_bot.handlers import admin_router
 
 # Logging Setup
+# Callers only enqueue records; the stdout/file handlers run on the listener's thread
+# so disk and console I/O never block the event loop.
 logger = logging.getLogger(__name__)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        RotatingFileHandler(
-            LOG_DIR / "insightor.log",
-            maxBytes=100*1024, # 100KB
-            backupCount=1
-        )
-    ]
+_log_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """Compress the rolled-over log instead of keeping a plain copy (runs on the listener thread)."""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb', compresslevel=1) as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+_file_handler = RotatingFileHandler(
+    LOG_DIR / "insightor.log",
+    maxBytes=100*1024, # 100KB
+    backupCount=1
 )
+_file_handler.namer = lambda name: name + ".gz"
+_file_handler.rotator = _gzip_rotator
+_log_handlers = [logging.StreamHandler(sys.stdout), _file_handler]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue: queue.Queue = queue.Queue(-1)
+logging.root.setLevel(logging.INFO)
+logging.root.addHandler(QueueHandler(_log_queue))
+_log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+# Per-update and per-job INFO lines from the libraries are noise; keep their warnings and errors
+for _name in ("aiogram", "apscheduler"):
+    logging.getLogger(_name).setLevel(logging.WARNING)
 
 # Services
-scheduler = AsyncIOScheduler()
+# Overlapping or backed-up runs of any job collapse into one; late triggers still run within a minute
+scheduler = AsyncIOScheduler(job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': 60})
 scraper = BazarakiScraper()
 
-# Bot Setup
-admin_bot = Bot(token=BOT_TOKEN)
-user_bot = Bot(token=USER_BOT_TOKEN) if USER_BOT_TOKEN else None
+# Bot Setup (all outgoing messages are HTML unless a call overrides parse_mode)
+_BOT_DEFAULTS = DefaultBotProperties(parse_mode="HTML")
+
+def _bot_session() -> AiohttpSession:
+    """HTTP session whose pooled Telegram connections stay open between notification bursts."""
+    session = AiohttpSession(limit=50)
+    session._connector_init["keepalive_timeout"] = 75
+    return session
+
+admin_bot = Bot(token=BOT_TOKEN, session=_bot_session(), default=_BOT_DEFAULTS)
+user_bot = Bot(token=USER_BOT_TOKEN, session=_bot_session(), default=_BOT_DEFAULTS) if USER_BOT_TOKEN else None
+
+# getUpdates long-poll timeout in seconds (aiogram defaults to 10)
+POLLING_TIMEOUT = 20
+
+# Max concurrent user notification sends (pacing itself is done by shared.rate_limiter)
+NOTIFY_CONCURRENCY = 25
+# Seconds allowed for one Telegram send call (the rate limiter's pacing wait is not counted)
+NOTIFY_SEND_TIMEOUT = 10
+# Shared by every notification task, so overlapping notifications are capped together
+_notify_sem = asyncio.Semaphore(NOTIFY_CONCURRENCY)
+
+# Where admin notifications go: the channel if configured, otherwise the admin DM
+_TARGET_ID = CHANNEL_ID or ADMIN_ID
 
 # Dispatchers
 dp_admin = Dispatcher()
@@ -61,63 +113,66 @@ class AdminMiddleware(BaseMiddleware):
 
 async def _notify_admin(msg_text: str):
     """Send notification to Admin/Channel."""
-    target_id = CHANNEL_ID if CHANNEL_ID else ADMIN_ID
-    if target_id:
+    if _TARGET_ID:
         try:
-            await admin_bot.send_message(target_id, msg_text, parse_mode="HTML")
+            await send_message(admin_bot, _TARGET_ID, msg_text)
         except Exception as e:
-            logger.error(f"Failed to notify admin: {e}")
+            logger.error("Failed to notify admin: %s", e)
 
-async def _notify_matching_users(ad_data: Dict[str, Any], msg_text: str):
-    """Notify users whose alerts match the new ad."""
+async def _notify_matching_users(ad_data: Dict[str, Any], msg_text: str, alert_index: Optional[AlertIndex] = None):
+    """Notify users whose alerts match the new ad (alert_index: snapshot to use instead of querying)."""
     if not user_bot: return
 
-    alerts = await get_active_alerts()
-    logger.debug(f"Notify User: Loaded {len(alerts)} active alerts.")
+    if alert_index is None:
+        alert_index = index_alerts(await get_active_alerts())
     
-    notified_users = set()
-
-    for alert in alerts:
+    # First matching alert per user; each user gets at most one message per ad.
+    # Only alerts for the ad's brand (or no brand) can match, so the rest are never checked.
+    matched: Dict[int, Dict[str, Any]] = {}
+    for alert in candidate_alerts(alert_index, ad_data):
         user_id = alert['user_id']
-        if user_id in notified_users:
-            continue
+        if user_id not in matched and get_alert_matcher(alert)(ad_data):
+            logger.info("MATCH FOUND: Ad %s for User %s", ad_data.get('ad_id'), user_id)
+            matched[user_id] = alert
+    if not matched:
+        return
 
-        try:
-            filters = json.loads(alert['filters'])
-        except: continue
-        
-        if is_match(ad_data, filters):
-            logger.info(f"MATCH FOUND: Ad {ad_data.get('ad_id')} for User {user_id}")
-            try:
-                # Append Alert Name
-                import html
-                safe_alert_name = html.escape(alert['name'])
-                final_msg = f"🔔 <b>{safe_alert_name}</b>\n\n{msg_text}"
-                
-                # Add Deactivate Button AND Follow Ad Button
-                buttons = [
-                    [
-                        InlineKeyboardButton(text="Follow", callback_data=f"toggle_follow:{ad_data['ad_id']}"),
-                        InlineKeyboardButton(text="Details", callback_data=f"more_details:{ad_data['ad_id']}"),
-                        InlineKeyboardButton(text="Deactivate", callback_data=f"toggle_alert:{alert['alert_id']}:off")
-                    ]
-                ]
-                kb = InlineKeyboardMarkup(inline_keyboard=buttons)
-
-                # Add timeout to prevent hanging the scraper cycle
-                await asyncio.wait_for(
-                    user_bot.send_message(user_id, final_msg, parse_mode="HTML", reply_markup=kb),
-                    timeout=10
-                )
-                logger.debug(f"Notification sent to {user_id}")
-                notified_users.add(user_id)
-            except asyncio.TimeoutError:
-                logger.error(f"Timeout notifying user {user_id}")
-            except Exception as u_e:
-                logger.warning(f"Failed to notify user {user_id}: {u_e}")
-
-async def notify_user(notification_type: str, ad_data: dict):
+    async def _send(user_id: int, alert: Dict[str, Any]):
+        # Append Alert Name
+        safe_alert_name = html.escape(alert['name'])
+        final_msg = f"🔔 <b>{safe_alert_name}</b>\n\n{msg_text}"
+
+        # Add Deactivate Button AND Follow Ad Button
+        buttons = [
+            [
+                InlineKeyboardButton(text="Follow", callback_data=f"toggle_follow:{ad_data['ad_id']}"),
+                InlineKeyboardButton(text="Details", callback_data=f"more_details:{ad_data['ad_id']}"),
+                InlineKeyboardButton(text="Deactivate", callback_data=f"toggle_alert:{alert['alert_id']}:off")
+            ]
+        ]
+        kb = InlineKeyboardMarkup(inline_keyboard=buttons)
+
+        async with _notify_sem:
+            # Timeout on the HTTP call only, so a hung request can't hold up the cycle
+            # while sends queued behind the per-chat limit still go out
+            await send_message(user_bot, user_id, final_msg, timeout=NOTIFY_SEND_TIMEOUT, reply_markup=kb)
+        logger.debug("Notification sent to %s", user_id)
+
+    user_ids = list(matched)
+    results = await asyncio.gather(*(_send(uid, matched[uid]) for uid in user_ids), return_exceptions=True)
+    for user_id, result in zip(user_ids, results):
+        if isinstance(result, asyncio.TimeoutError):
+            logger.error("Timeout notifying user %s", user_id)
+        elif isinstance(result, Exception):
+            logger.warning("Failed to notify user %s: %s", user_id, result)
+
+async def notify_user(notification_type: str, ad_data: dict, alert_index: Optional[AlertIndex] = None):
     """Send notification to Telegram (Admin & Users)."""
+    # Users only hear about new/repost ads (handled by alerts)
+    notify_users = bool(user_bot) and notification_type in ('new', 'repost')
+    if not _TARGET_ID and not notify_users:
+        return # Nobody to send to; skip formatting
+
     try:
         msg_text = format_ad_message(ad_data, notification_type)
         if not msg_text: return
@@ -125,18 +180,18 @@ async def notify_user(notification_type: str, ad_data: dict):
         # 1. Notify Admin
         await _notify_admin(msg_text)
         
-        # 2. Notify Users (only for new/repost, handled by alerts)
-        if notification_type in ['new', 'repost']:
-            await _notify_matching_users(ad_data, msg_text)
+        # 2. Notify Users
+        if notify_users:
+            await _notify_matching_users(ad_data, msg_text, alert_index)
 
     except Exception as e:
-        logger.error(f"Failed to send notification: {e}")
+        logger.error("Failed to send notification: %s", e)
 
 async def process_follow_notifications(notifications: List[Dict[str, Any]]):
     """Process updates for followed ads."""
     if not user_bot: return
 
-    logger.info(f"Processing {len(notifications)} follow notifications.")
+    logger.info("Processing %s follow notifications.", len(notifications))
     
     for note in notifications:
         ad_data = note['ad']
@@ -172,33 +227,33 @@ async def process_follow_notifications(notifications: List[Dict[str, Any]]):
         
         for user_id in followers:
             try:
-                await user_bot.send_message(user_id, change_msg, parse_mode="HTML", reply_markup=kb)
+                await send_message(user_bot, user_id, change_msg, reply_markup=kb)
             except Exception as e:
-                logger.warning(f"Failed to notify follower {user_id}: {e}")
+                logger.warning("Failed to notify follower %s: %s", user_id, e)
 
 # Scraper Job Wrapper
 async def scraper_job():
     """Scheduled job to run the scraper cycle."""
-    if scraper.is_running:
-        logger.warning("Scraper cycle already running. Skipping.")
-        return
-
     logger.info("Scheduler Trigger: Starting scraper cycle.")
     
     # Notify Start
     await _notify_admin("🏁 <b>Scraper cycle started...</b>")
 
     # Run Cycle
-    new_ads_count = await scraper.run_cycle(notify_callback=notify_user)
+    # One alerts snapshot per cycle; alert edits made mid-cycle apply from the next one
+    alert_index = index_alerts(await get_active_alerts()) if user_bot else {}
+    new_ads_count = await scraper.run_cycle(notify_callback=functools.partial(notify_user, alert_index=alert_index))
     
     # Run Followed Ads Check
     follow_notifications = await scraper.check_followed_ads()
     if follow_notifications:
         await process_follow_notifications(follow_notifications)
 
-    next_run = datetime.now() + timedelta(minutes=35)
+    # The scheduler already computed the next fire time before running this job
+    job = scheduler.get_job('scraper_job')
+    next_run = job.next_run_time if job and job.next_run_time else datetime.now() + timedelta(minutes=35)
     next_run_str = next_run.strftime('%H:%M:%S')
-    logger.info(f"Cycle finished. Next run approx: {next_run_str}")
+    logger.info("Cycle finished. Next run approx: %s", next_run_str)
     
     # Notify Finish
     text = (
@@ -209,11 +264,20 @@ async def scraper_job():
     )
     await _notify_admin(text)
 
+async def checkpoint_job():
+    """Scheduled job to keep the SQLite WAL file from growing."""
+    try:
+        await checkpoint_wal()
+    except Exception as e:
+        logger.warning("WAL checkpoint failed: %s", e)
+
 
 async def on_startup():
-    # Ensure job is added
+    # Runs on every dispatcher (re)start: add each job once, keeping an existing job's schedule
     if not scheduler.get_job('scraper_job'):
         scheduler.add_job(scraper_job, 'interval', minutes=35, id='scraper_job')
+    if not scheduler.get_job('checkpoint_job'):
+        scheduler.add_job(checkpoint_job, 'interval', minutes=5, id='checkpoint_job')
     
     if not scheduler.running:
         scheduler.start()
@@ -224,10 +288,11 @@ async def on_startup():
                 BotCommand(command="start", description="Main Menu / Restart"),
             ])
         except Exception as e:
-            logger.warning(f"Failed to set commands: {e}")
+            logger.warning("Failed to set commands: %s", e)
 
 async def main():
     await init_db()
+    await init_activity_db()
     
     # Setup Admin Bot
     dp_admin.message.middleware(AdminMiddleware())
@@ -240,7 +305,8 @@ async def main():
     
 
     # Setup User Bot
-    from client_bot.middleware import UserActivityMiddleware
+    from client_bot.middleware import UserActivityMiddleware, start_activity_logger
+    start_activity_logger()
     dp_user.message.middleware(UserActivityMiddleware())
     dp_user.callback_query.middleware(UserActivityMiddleware())
 
@@ -257,25 +323,39 @@ async def main():
     else:
         logger.warning("USER_BOT_TOKEN not found.")
         
-    await asyncio.gather(*tasks)
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        await admin_bot.session.close()
+        if user_bot:
+            await user_bot.session.close()
+        await scraper.close()
+        await close_db()
+        await close_activity_db()
 
 async def start_polling_safe(dp: Dispatcher, bot: Bot, name: str):
     """Run polling with infinite retry logic for network issues."""
     
     while True:
         try:
-            await dp.start_polling(bot)
+            await dp.start_polling(bot, polling_timeout=POLLING_TIMEOUT)
         except (TelegramNetworkError, ClientConnectorError, ClientOSError, ConnectionResetError) as e:
-            logger.error(f"⚠️ {name} connection failed: {e}. Retrying in 5s...")
+            logger.error("⚠️ %s connection failed: %s. Retrying in 5s...", name, e)
             await asyncio.sleep(5)
         except Exception as e:
-            logger.exception(f"❌ {name} crashed with unexpected error: {e}. Retrying in 10s...")
+            logger.exception("❌ %s crashed with unexpected error: %s. Retrying in 10s...", name, e)
             await asyncio.sleep(10)
         finally:
             # Short sleep to prevent tight loops if start_polling returns immediately
             await asyncio.sleep(1)
 
 if __name__ == "__main__":
+    # libuv-based loop where available; the scraper and both bots are almost all I/O waits
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     try:
         asyncio.run(main())
     except (KeyboardInterrupt, SystemExit):
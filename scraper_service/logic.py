@@ -1,25 +1,186 @@
+import aiohttp
 import asyncio
 import cloudscraper
+import hashlib
+import json
 import logging
+import lxml.html
 import random
+import re
+import time
 from bs4 import BeautifulSoup, Tag
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
+from requests.adapters import Retry
+from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Any, Optional
 
+from shared.config import COOKIES_PATH
 from shared.constants import (
     BASE_URL, SEARCH_URL, REQUEST_DELAY_MIN, REQUEST_DELAY_MAX, 
-    MAX_CONSECUTIVE_UNCHANGED, MAX_PAGES_LIMIT, USER_AGENT_LIST
+    MAX_CONSECUTIVE_UNCHANGED, MAX_PAGES_LIMIT, USER_AGENT_LIST, DETAIL_FETCH_CONCURRENCY
 )
 from shared.database import (
-    add_ad, get_ad, update_ad_price, update_ad_post_date, touch_ad, 
+    add_ads_bulk, get_ad, get_ads_bulk, upsert_ads_changes_bulk, update_ad_price, update_ad_post_date,
     update_ad_status, get_followed_ads, 
     add_history_entry, update_follow_check_status, get_ad_failed_checks
 )
 from shared.utils import AdData
-from dateparser import parse as parse_date
+from dateparser import DateDataParser
 
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between writes of the Cloudflare cookies to disk
+COOKIE_SAVE_INTERVAL = 600
+# Keep-alive connections (and fetch threads) for cloudscraper; every request goes to the same host
+HTTP_POOL_SIZE = 16
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching a single class token, like BeautifulSoup's class_=name."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# Listing and ad pages are parsed with raw lxml and precompiled XPath; BeautifulSoup's tree walk dominated parse time
+_XP_CONTAINERS = etree.XPath(f"//*[{_has_class('list-simple__output')}]")
+_XP_CHILD_LI = etree.XPath("./li")
+_XP_CHILD_DIV = etree.XPath("./div")
+_XP_TITLE_LINK = etree.XPath(f".//a[{_has_class('advert__content-title')}][1]")
+_XP_ANY_LINK = etree.XPath(".//a[@href][1]")
+_XP_PRICE = etree.XPath(f".//*[{_has_class('advert__content-price')}][1]")
+_XP_PRICE_P = etree.XPath(f".//p[{_has_class('price')}][1]")
+_XP_VIP = etree.XPath(f"boolean(.//*[@data-t-vip] | .//*[{_has_class('ribbon-vip')}])")
+_XP_TOP = etree.XPath(f"boolean(.//*[{_has_class('label-top')} or {_has_class('ribbon-top')} or {_has_class('_top')}])")
+_XP_TIME = etree.XPath(f".//*[{_has_class('list-simple__time')}][1]")
+
+# Ad detail pages are queried from the document root, like soup.find
+_XP_DATE_META = etree.XPath(f"//span[{_has_class('date-meta')}][1]")
+_XP_BREADCRUMBS = etree.XPath("(//*[@data-breadcrumbs])[1]/@data-breadcrumbs")
+_XP_TITLE = etree.XPath("(//title)[1]")
+_XP_H1_TITLE = etree.XPath(f"(//h1[{_has_class('page-title')}])[1]")
+_XP_CHARS = etree.XPath(f"(//ul[{_has_class('chars-column')}])[1]")
+_XP_DESC_LI = etree.XPath(".//li")
+_XP_KEY_CHARS = etree.XPath(f"(.//span[{_has_class('key-chars')}])[1]")
+_XP_VALUE_CHARS = etree.XPath(f"(.//*[{_has_class('value-chars')}])[1]")
+_XP_AUTHOR = etree.XPath(f"(//div[{_has_class('author-name')}])[1]")
+_XP_DESC_IMG = etree.XPath("(.//img)[1]")
+_XP_BUSINESS_BADGE = etree.XPath(f"boolean(//*[{_has_class('author-distinctions__item')} or {_has_class('verification-badge')}])")
+_XP_SHOP_LINK = etree.XPath("boolean(//a[contains(@href, '/shop/')])")
+_XP_BUSINESS_CONTACT = etree.XPath(f"boolean(//*[{_has_class('js-show-popup-contact-business')}])")
+_XP_DETAIL_VIP = etree.XPath(f"boolean(//*[{_has_class('ribbon-vip')} or {_has_class('label-vip')}])")
+_XP_DETAIL_TOP = etree.XPath(f"boolean(//*[{_has_class('label-top')}])")
+
+# Non-digit runs to strip from a price fragment, and the numeric id at the start of an ad link
+_NON_DIGITS_RE = re.compile(r'\D+')
+_AD_ID_RE = re.compile(r'^/adv/(\d+)')
+
+# Post date shapes handled without dateparser (which costs ~1 ms a call)
+_RELATIVE_DATE_RE = re.compile(r'(today|yesterday),?\s+(\d{1,2}):(\d{2})', re.IGNORECASE)
+_ISO_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?')
+_DOTTED_DATE_RE = re.compile(r'\d{1,2}\.\d{1,2}\.\d{4}(?:\s+\d{1,2}:\d{2})?')
+
+# One English-only parser: skips dateparser.parse's per-call language detection (the site is served in English)
+_date_parser = DateDataParser(languages=['en'])
+
+def parse_date(text: str) -> Optional[datetime]:
+    return _date_parser.get_date_data(text).date_obj
+
+@lru_cache(maxsize=2048)
+def _parse_absolute_date(text: str) -> Optional[datetime]:
+    return parse_date(text)
+
+def _parse_post_date(text: str) -> Optional[datetime]:
+    """
+    parse_date with fast paths: "Today/Yesterday HH:MM" is built directly, stored
+    ISO timestamps go through fromisoformat, and absolute dotted dates are memoized.
+    Dotted dates still go to dateparser so their (month-first) reading stays the same.
+    Relative strings like "2 hours ago" are never cached, since their meaning moves with the clock.
+    """
+    match = _RELATIVE_DATE_RE.fullmatch(text)
+    if match:
+        hour, minute = int(match.group(2)), int(match.group(3))
+        if hour < 24 and minute < 60:
+            day = datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
+            return day - timedelta(days=1) if match.group(1).lower() == 'yesterday' else day
+    elif _ISO_DATE_RE.fullmatch(text):
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            pass
+    elif _DOTTED_DATE_RE.fullmatch(text):
+        return _parse_absolute_date(text)
+    return parse_date(text)
+
+def _first(*results: list) -> Any:
+    """First node of the first non-empty XPath result (lxml elements can't be chained with `or`)."""
+    for nodes in results:
+        if nodes:
+            return nodes[0]
+    return None
+
+def _text(el: Any, separator: str = '') -> str:
+    """Equivalent of BeautifulSoup's get_text(separator, strip=True) for an lxml element."""
+    return separator.join(s for s in (t.strip() for t in el.itertext()) if s)
+
+def _price_from_text(text: str) -> int:
+    """Lowest number in a '|'-separated price text such as "10 000|12 000"."""
+    try:
+        # Digits are joined per fragment: "10 000" is 10000, not 10 and 0
+        digits = (_NON_DIGITS_RE.sub('', p) for p in text.split('|'))
+        found_prices = [int(d) for d in digits if d]
+        if found_prices:
+            return min(found_prices)
+    except ValueError:
+        logger.warning("Failed to parse price from: %s", text)
+    return 0
+
+def _parse_year(val: str) -> int:
+    try:
+        return int(val)
+    except ValueError:
+        return 0
+
+def _parse_engine_size(val: str) -> int:
+    """Engine size in cc: "2.0L" -> 2000, "600cc" -> 600, electric -> 0."""
+    try:
+        clean_val = val.lower().replace('l', '').replace('cc', '').replace(',', '.').strip()
+        if 'electric' in clean_val:
+            return 0
+        size = float(clean_val)
+        if size < 10: # Assumed to be Liters (e.g. 2.0)
+            return int(size * 1000)
+        return int(size) # Assumed to be cc (e.g. 600, 1500)
+    except (ValueError, TypeError):
+        return 0
+
+def _parse_mileage(val: str) -> int:
+    try:
+        return int(val.lower().replace('km', '').replace(' ', ''))
+    except ValueError:
+        return 0
+
+def _as_is(val: str) -> str:
+    return val
+
+# Spec row key substring -> (details field, coercion, only set if not already known), in match priority order
+_SPEC_FIELDS = (
+    ('brand', 'car_brand', _as_is, True),
+    ('model', 'car_model', _as_is, True),
+    ('year', 'car_year', _parse_year, False),
+    ('gearbox', 'gearbox', _as_is, False),
+    ('body type', 'body_type', _as_is, False),
+    ('fuel type', 'fuel_type', _as_is, False),
+    ('engine size', 'engine_size', _parse_engine_size, False),
+    ('drive', 'drive_type', _as_is, False),
+    ('color', 'car_color', _as_is, False),
+    ('colour', 'car_color', _as_is, False),
+    ('mileage', 'mileage', _parse_mileage, False),
+)
+
+@lru_cache(maxsize=256)
+def _spec_fields(key: str) -> tuple:
+    """Candidate fields for a spec row key; the site uses a handful of keys, so each is scanned once."""
+    return tuple(spec[1:] for spec in _SPEC_FIELDS if spec[0] in key)
+
 class BazarakiScraper:
     def __init__(self):
         self.scraper = cloudscraper.create_scraper(
@@ -29,119 +190,233 @@ class BazarakiScraper:
                 'desktop': True
             }
         )
+        # Resize cloudscraper's own adapters in place: the https one carries its TLS fingerprint.
+        # Transient 502/504s and connection errors are retried; 503 is left alone since it's the challenge page.
+        for adapter in self.scraper.adapters.values():
+            adapter.max_retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 504], raise_on_status=False)
+            adapter.init_poolmanager(HTTP_POOL_SIZE, HTTP_POOL_SIZE)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Native async client for the common, unchallenged case; created lazily on the running loop
+        self.session: Optional[aiohttp.ClientSession] = None
+        # url -> (conditional request headers, body) for pages fetched with conditional=True
+        self._page_cache: dict[str, tuple[dict[str, str], str]] = {}
+        # url -> (body digest, parsed ads) of the last listing parse, reused while the page is identical
+        self._parsed_listings: dict[str, tuple[bytes, list[dict[str, Any]]]] = {}
+        self._cookies_saved_at: Optional[float] = None
+        self._load_cookies()
         self.stop_signal = False
         self.is_running = False
 
+    def _load_cookies(self) -> None:
+        """Restore the clearance cookies of a previous run, so a restart doesn't start with a challenge."""
+        try:
+            cookies = json.loads(COOKIES_PATH.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable cookie file %s: %s", COOKIES_PATH, e)
+            return
+        now = time.time()
+        for c in cookies:
+            if c.get('expires') and c['expires'] <= now:
+                continue
+            self.scraper.cookies.set(c['name'], c['value'], domain=c['domain'], path=c['path'], expires=c.get('expires'))
+        logger.info("Loaded %d saved cookies", len(self.scraper.cookies))
+
+    def _save_cookies(self) -> None:
+        cookies = [
+            {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path, 'expires': c.expires}
+            for c in self.scraper.cookies
+        ]
+        try:
+            COOKIES_PATH.write_text(json.dumps(cookies))
+        except OSError as e:
+            logger.warning("Failed to save cookies: %s", e)
+
+    async def _persist_cookies(self) -> None:
+        """Write the cookies after a cloudscraper success, at most every COOKIE_SAVE_INTERVAL seconds."""
+        now = time.monotonic()
+        if self._cookies_saved_at is not None and now - self._cookies_saved_at < COOKIE_SAVE_INTERVAL:
+            return
+        self._cookies_saved_at = now
+        await asyncio.to_thread(self._save_cookies)
+
     def get_random_user_agent(self) -> str:
         return random.choice(USER_AGENT_LIST)
 
-    async def fetch_page(self, url: str) -> str | None:
-        """Fetch a page using cloudscraper in a thread."""
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Own pool for blocking cloudscraper calls, so they don't compete with to_thread parsing
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix="cloudscraper")
+        return self._executor
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=30),
+            )
+        return self.session
+
+    def _remember_page(self, url: str, response_headers: Any, text: str) -> None:
+        """Keep a page's ETag/Last-Modified validators and body for the next conditional fetch."""
+        validators = {}
+        if etag := response_headers.get('ETag'):
+            validators['If-None-Match'] = etag
+        if last_modified := response_headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = last_modified
+        if validators:
+            self._page_cache[url] = (validators, text)
+        else:
+            self._page_cache.pop(url, None)
+
+    async def _fetch_async(self, url: str, headers: dict[str, str], conditional: bool = False) -> str | None:
+        """
+        Fetch over the pooled aiohttp session, reusing cloudscraper's clearance cookies.
+        Returns None when Cloudflare wants a challenge solved (or on any error) so the caller can fall back.
+        """
+        try:
+            async with self._get_session().get(url, headers=headers, cookies=self.scraper.cookies.get_dict()) as response:
+                if response.status == 304 and url in self._page_cache:
+                    return self._page_cache[url][1]
+                text = await response.text()
+                if response.status != 200 or "<title>Just a moment...</title>" in text:
+                    logger.debug("Async fetch of %s got status %s, falling back to cloudscraper", url, response.status)
+                    return None
+                if conditional:
+                    self._remember_page(url, response.headers, text)
+                return text
+        except Exception as e:
+            logger.debug("Async fetch of %s failed (%s), falling back to cloudscraper", url, e)
+            return None
+
+    async def fetch_page(self, url: str, conditional: bool = False) -> str | None:
+        """
+        Fetch a page, via aiohttp when possible and cloudscraper (in a thread) when challenged.
+        With conditional=True the request carries the page's last ETag/Last-Modified, and a
+        304 Not Modified answer returns the previously fetched body without transferring it again.
+        """
         headers = {
             "User-Agent": self.get_random_user_agent(),
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.9",
             "Upgrade-Insecure-Requests": "1",
         }
+        if conditional and url in self._page_cache:
+            headers.update(self._page_cache[url][0])
+
+        text = await self._fetch_async(url, headers, conditional)
+        if text is not None:
+            return text
         
         loop = asyncio.get_running_loop()
         try:
-            response = await loop.run_in_executor(None, lambda: self.scraper.get(url, headers=headers))
+            # cloudscraper solves the challenge and refreshes the cookies the async path reuses
+            response = await loop.run_in_executor(self._get_executor(), lambda: self.scraper.get(url, headers=headers))
+
+            if response.status_code == 304 and url in self._page_cache:
+                return self._page_cache[url][1]
             
             if response.status_code == 403 or (response.status_code != 200 and ("challenge" in response.text.lower() or "cloudflare" in response.text.lower())):
-                logger.error(f"CRITICAL: Cloudflare Block or 403 Forbidden. Status: {response.status_code}")
+                logger.error("CRITICAL: Cloudflare Block or 403 Forbidden. Status: %s", response.status_code)
+                # Saved cookies no longer clear the check; don't restore them on the next start
+                COOKIES_PATH.unlink(missing_ok=True)
+                self._cookies_saved_at = None
                 return None
             
             if "<title>Just a moment...</title>" in response.text:
-                 logger.error(f"CRITICAL: Cloudflare Challenge Page Detected (Status 200)")
+                 logger.error("CRITICAL: Cloudflare Challenge Page Detected (Status 200)")
                  return None
 
+            if conditional and response.status_code == 200:
+                self._remember_page(url, response.headers, response.text)
+            if response.status_code == 200:
+                await self._persist_cookies()
             return response.text
         except Exception as e:
-            logger.error(f"Error fetching {url}: {e}")
+            logger.error("Error fetching %s: %s", url, e)
             return None
     
     def _extract_price(self, tag: Optional[Tag]) -> int:
         """Helper to extract price from a price tag."""
         if not tag:
             return 0
-        try:
-            text = tag.get_text(separator='|', strip=True)
-            # Extract all numbers from "10 000 | 12 000"
-            found_prices = [int(''.join(filter(str.isdigit, p))) for p in text.split('|') if any(c.isdigit() for c in p)]
-            if found_prices:
-                return min(found_prices)
-        except ValueError:
-            logger.warning(f"Failed to parse price from: {text}")
-        return 0
+        return _price_from_text(tag.get_text(separator='|', strip=True))
 
-    def _detect_business_status(self, soup: BeautifulSoup, url: str) -> bool:
+    def _detect_business_status(self, root: Any, url: str) -> bool:
         """Helper to check if ad is from a business account."""
         # 1. Check for "distinctions" badge (often used for Pro/Business sellers)
-        if soup.find(class_='author-distinctions__item') or soup.find(class_='verification-badge'):
-             logger.debug(f"Detected Business via Badge for {url}")
+        if _XP_BUSINESS_BADGE(root):
+             logger.debug("Detected Business via Badge for %s", url)
              return True
         
         # 2. Check for dedicated "Shop" link
-        if soup.find('a', href=lambda h: h and '/shop/' in h):
-             logger.debug(f"Detected Business via Shop Link for {url}")
+        if _XP_SHOP_LINK(root):
+             logger.debug("Detected Business via Shop Link for %s", url)
              return True
              
         # 3. Reliable Check: "js-show-popup-contact-business"
         # This class appears on the contact button for business accounts
-        if soup.find(class_='js-show-popup-contact-business'):
-             logger.debug(f"Detected Business via Contact Popup Class for {url}")
+        if _XP_BUSINESS_CONTACT(root):
+             logger.debug("Detected Business via Contact Popup Class for %s", url)
              return True
         
         return False
 
     def parse_listing_page(self, html: str) -> list[dict[str, Any]]:
         """Parse the listing page and extract ad cards."""
-        soup = BeautifulSoup(html, 'lxml')
-        containers = soup.find_all(class_='list-simple__output')
+        try:
+            root = lxml.html.fromstring(html)
+        except (etree.ParserError, ValueError):
+            return []
+        containers = _XP_CONTAINERS(root)
         
         if not containers:
             return []
         
         ads = []
         for container in containers:
-             items = container.find_all('li', recursive=False) or container.find_all('div', recursive=False)
+             items = _XP_CHILD_LI(container) or _XP_CHILD_DIV(container)
              
              for item in items:
-                classes = item.get('class', [])
+                classes = (item.get('class') or '').split()
                 if 'banner' in classes or 'ads-google' in classes:
                     continue
                     
-                link_tag = item.find('a', class_='advert__content-title') or item.find('a', href=True)
-                if not link_tag:
+                link_tag = _first(_XP_TITLE_LINK(item), _XP_ANY_LINK(item))
+                if link_tag is None:
                    continue
                 
-                href = link_tag['href']
-                if not href.startswith('/') or '/adv/' not in href:
-                    continue
-                
-                # Extract ID
-                try:
-                    # /adv/123456_slug/ -> 123456
-                    ad_id = href.strip('/').split('/')[1].split('_')[0]
-                except IndexError:
+                href = link_tag.get('href') or ''
+                # /adv/123456_slug/ -> 123456
+                id_match = _AD_ID_RE.match(href)
+                if not id_match:
                     continue
+                ad_id = id_match.group(1)
 
                 full_url = f"{BASE_URL}{href}"
                 
                 # Extract Price
-                price_tag = item.find(class_='advert__content-price') or item.find('p', class_='price')
-                price = self._extract_price(price_tag)
+                price_tag = _first(_XP_PRICE(item), _XP_PRICE_P(item))
+                price = _price_from_text(_text(price_tag, '|')) if price_tag is not None else 0
 
                 # Status
-                is_vip = item.has_attr('data-t-vip') or item.find(attrs={"data-t-vip": True}) or item.find(class_='ribbon-vip')
-                is_top = item.find(class_='label-top') or item.find(class_='ribbon-top') or item.find(class_='_top')
+                is_vip = item.get('data-t-vip') is not None or _XP_VIP(item)
+                is_top = _XP_TOP(item)
                 
                 status = 'VIP' if is_vip else 'TOP' if is_top else 'Basic'
                 
                 # Date
-                date_tag = item.find(class_='list-simple__time')
-                post_date = parse_date(date_tag.get_text(strip=True)) if date_tag else None
+                date_tag = _first(_XP_TIME(item))
+                post_date = _parse_post_date(_text(date_tag)) if date_tag is not None else None
                 
                 ads.append({
                     'ad_id': ad_id,
@@ -153,29 +428,59 @@ class BazarakiScraper:
             
         return ads
 
+    def _parse_listing_cached(self, url: str, html: str) -> list[dict[str, Any]]:
+        """parse_listing_page, skipped when the page body is identical to its last parse."""
+        digest = hashlib.blake2b(html.encode(), digest_size=16).digest()
+        cached = self._parsed_listings.get(url)
+        if cached and cached[0] == digest:
+            logger.debug("Listing %s unchanged since last cycle, reusing parsed ads", url)
+            return cached[1]
+        ads = self.parse_listing_page(html)
+        self._parsed_listings[url] = (digest, ads)
+        return ads
+
+    async def _fetch_listing(self, page: int, delay: float = 0.0) -> list[dict[str, Any]] | None:
+        """Fetch and parse one listing page after `delay` seconds; None if the fetch failed."""
+        if delay:
+            await asyncio.sleep(delay)
+        url = f"{SEARCH_URL}?page={page}"
+        logger.debug("Fetching %s", url)
+        # Listing pages are fetched conditionally; an unchanged page comes back from the cache
+        html = await self.fetch_page(url, conditional=True)
+        if not html:
+            return None
+        return await asyncio.to_thread(self._parse_listing_cached, url, html)
+
     async def fetch_ad_details(self, url: str) -> dict[str, Any] | None:
         """Scrape details from the single ad page."""
         html = await self.fetch_page(url)
         if not html:
             return None
-            
-        soup = BeautifulSoup(html, 'lxml')
+        # Parsing is pure CPU; keep it off the event loop
+        return await asyncio.to_thread(self.parse_ad_details, html, url)
+
+    def parse_ad_details(self, html: str, url: str) -> dict[str, Any] | None:
+        """Parse the single ad page into its details."""
+        try:
+            root = lxml.html.fromstring(html)
+        except (etree.ParserError, ValueError):
+            return None
         details: dict[str, Any] = {}
         
         # Post date
-        date_span = soup.find('span', class_='date-meta')
-        if date_span:
-            details['post_date'] = parse_date(date_span.get_text(strip=True))
+        date_span = _first(_XP_DATE_META(root))
+        if date_span is not None:
+            details['post_date'] = _parse_post_date(_text(date_span))
         
         if 'post_date' not in details or not details['post_date']:
              # DO NOT use datetime.now() as it triggers false repost detection
              details['post_date'] = None
 
         # Breadcrumbs for Brand/Model
-        breadcrumb_tag = soup.find(attrs={"data-breadcrumbs": True})
-        if breadcrumb_tag:
+        breadcrumbs = _first(_XP_BREADCRUMBS(root))
+        if breadcrumbs is not None:
             # "Motors - Cars - Brand - Model"
-            parts = [p.strip() for p in breadcrumb_tag['data-breadcrumbs'].split(' - ') if p.strip()]
+            parts = [p.strip() for p in breadcrumbs.split(' - ') if p.strip()]
             if len(parts) >= 3 and 'Motors' in parts[0]:
                  if len(parts) > 2: details['car_brand'] = parts[2]
                  if len(parts) > 3: details['car_model'] = parts[3]
@@ -183,8 +488,10 @@ class BazarakiScraper:
         # Fallback: Extract from Title or H1 if breadcrumbs fail or are incomplete
         if not details.get('car_brand'):
              # Title format often: "Toyota Yaris Cross 1.5L 2024 for sale in ..."
-             page_title = soup.title.get_text(strip=True) if soup.title else ""
-             h1_text = soup.find('h1', class_='page-title').get_text(strip=True) if soup.find('h1', class_='page-title') else ""
+             title_tag = _first(_XP_TITLE(root))
+             h1_tag = _first(_XP_H1_TITLE(root))
+             page_title = _text(title_tag) if title_tag is not None else ""
+             h1_text = _text(h1_tag) if h1_tag is not None else ""
              
              # Combined check
              check_text = h1_text or page_title
@@ -200,74 +507,62 @@ class BazarakiScraper:
 
 
         # Specs
-        chars_list = soup.find('ul', class_='chars-column')
-        if chars_list:
-            for li in chars_list.find_all('li'):
-                key_tag = li.find('span', class_='key-chars')
-                val_tag = li.find(class_='value-chars')
+        chars_list = _first(_XP_CHARS(root))
+        if chars_list is not None:
+            for li in _XP_DESC_LI(chars_list):
+                key_tag = _first(_XP_KEY_CHARS(li))
+                val_tag = _first(_XP_VALUE_CHARS(li))
                 
-                if key_tag and val_tag:
-                    key = key_tag.get_text(strip=True).lower().replace(':', '')
-                    val = val_tag.get_text(strip=True)
-                    
-                    if 'brand' in key and not details.get('car_brand'): details['car_brand'] = val
-                    elif 'model' in key and not details.get('car_model'): details['car_model'] = val
-                    elif 'year' in key: 
-                        try: details['car_year'] = int(val)
-                        except: details['car_year'] = 0
-                    elif 'gearbox' in key: details['gearbox'] = val
-                    elif 'body type' in key: details['body_type'] = val
-                    elif 'fuel type' in key: details['fuel_type'] = val
-                    elif 'engine size' in key: 
-                        # Parse Engine Size: "2.0L" -> 2000, "600cc" -> 600
-                        try:
-                            clean_val = val.lower().replace('l', '').replace('cc', '').replace(',', '.').strip()
-                            if 'electric' in clean_val:
-                                details['engine_size'] = 0
-                            else:
-                                size = float(clean_val)
-                                if size < 10: # Assumed to be Liters (e.g. 2.0)
-                                    details['engine_size'] = int(size * 1000)
-                                else: # Assumed to be cc (e.g. 600, 1500)
-                                    details['engine_size'] = int(size)
-                        except (ValueError, TypeError):
-                            details['engine_size'] = 0
-                    elif 'drive' in key: details['drive_type'] = val
-                    elif 'color' in key or 'colour' in key: details['car_color'] = val
-                    elif 'mileage' in key:
-                         try: details['mileage'] = int(val.lower().replace('km', '').replace(' ', ''))
-                         except: details['mileage'] = 0
-                         
+                if key_tag is not None and val_tag is not None:
+                    key = _text(key_tag).lower().replace(':', '')
+                    val = _text(val_tag)
+
+                    # First candidate that applies wins (brand/model never overwrite a known value)
+                    for field, coerce, keep_known in _spec_fields(key):
+                        if keep_known and details.get(field):
+                            continue
+                        details[field] = coerce(val)
+                        break
+
         # Seller Info
-        author_div = soup.find('div', class_='author-name')
-        if author_div:
-             img = author_div.find('img')
-             if img and img.get('alt'):
+        author_div = _first(_XP_AUTHOR(root))
+        if author_div is not None:
+             img = _first(_XP_DESC_IMG(author_div))
+             if img is not None and img.get('alt'):
                  details['user_name'] = img.get('alt')
                  details['is_business'] = False # Default assumption, specific scraping might refine
              else:
-                 details['user_name'] = author_div.get_text(strip=True)
+                 details['user_name'] = _text(author_div)
                  details['is_business'] = False 
              
              if author_div.get('data-user'):
                  details['user_id'] = author_div.get('data-user')
              else:
-                 link = author_div.find('a', href=True) or author_div.parent.find('a', href=True)
-                 if link:
-                     details['user_id'] = link['href'].strip('/').split('/')[-1]
+                 parent = author_div.getparent()
+                 link = _first(_XP_ANY_LINK(author_div), _XP_ANY_LINK(parent) if parent is not None else [])
+                 if link is not None:
+                     details['user_id'] = link.get('href').strip('/').split('/')[-1]
         
         # Improved Business Check
-        if self._detect_business_status(soup, url):
+        if self._detect_business_status(root, url):
             details['is_business'] = True
         
         # Check Status in details
-        if soup.find(class_='ribbon-vip') or soup.find(class_='label-vip'):
+        if _XP_DETAIL_VIP(root):
              details['ad_status_update'] = 'VIP'
-        elif soup.find(class_='label-top'):
+        elif _XP_DETAIL_TOP(root):
              details['ad_status_update'] = 'TOP'
         
         return details
 
+    @staticmethod
+    async def _notify(notify_callback, notification_type: str, ad_data: dict[str, Any]) -> None:
+        """Run one notification, logging its failure instead of letting it end the cycle."""
+        try:
+            await notify_callback(notification_type, ad_data)
+        except Exception as e:
+            logger.error("Failed to send %s notification for ad %s: %s", notification_type, ad_data.get('ad_id'), e)
+
     async def run_cycle(self, notify_callback):
         """The main scraping loop."""
         self.is_running = True
@@ -278,38 +573,52 @@ class BazarakiScraper:
         
         logger.info("Starting scraper cycle...")
         
+        notify_tasks: list[asyncio.Task] = []
+        next_listing: asyncio.Task | None = asyncio.create_task(self._fetch_listing(page))
         try:
-            while not self.stop_signal:
-                url = f"{SEARCH_URL}?page={page}"
-                logger.debug(f"Fetching {url}")
-                
-                html = await self.fetch_page(url)
-                if not html:
+            while not self.stop_signal and next_listing is not None:
+                ads = await next_listing
+                next_listing = None
+                if ads is None:
                     break
-                    
-                ads = self.parse_listing_page(html)
                 if not ads:
                     logger.info("No ads found on page, end of pagination.")
                     break
+
+                # Prefetch the next page (after the usual anti-ban delay) while this one is processed
+                if page < MAX_PAGES_LIMIT:
+                    next_listing = asyncio.create_task(
+                        self._fetch_listing(page + 1, random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX))
+                    )
                 
-                logger.info(f"Page {page}: Found {len(ads)} ads. Processing...")
+                logger.info("Page %s: Found %s ads. Processing...", page, len(ads))
+
+                # New ads are collected and written once per page, in one transaction
+                new_ads: list[AdData] = []
+                new_ad_ids: set[str] = set()
+                to_fetch: list[dict[str, Any]] = []
+                # Existing-ad writes and their notifications, flushed together after the pass
+                pending_updates: list[tuple[str, dict[str, Any]]] = []
+                pending_notifications: list[tuple[str, dict[str, Any]]] = []
+                # One query for every stored ad on the page
+                existing_ads = await get_ads_bulk([ad['ad_id'] for ad in ads])
                     
                 for i, ad in enumerate(ads):
                     if self.stop_signal:
                         break
                         
                     ad_id = ad['ad_id']
+                    if ad_id in new_ad_ids:
+                        continue  # Listed twice on this page, already queued
                     current_price = ad['price']
                     ad_status = ad['status']
                     
-                    existing_ad = await get_ad(ad_id)
-                    should_fetch_details = False
-                    notification_type = None
+                    existing_ad = existing_ads.get(ad_id)
                     
                     if not existing_ad:
-                        # NEW AD: Must fetch details
-                        should_fetch_details = True
-                        notification_type = 'new'
+                        # NEW AD: Must fetch details (done for the whole page below)
+                        to_fetch.append(ad)
+                        new_ad_ids.add(ad_id)
                         if ad_status == 'Basic':
                             consecutive_basic_unchanged = 0 
                     else:
@@ -318,21 +627,21 @@ class BazarakiScraper:
                         db_status = existing_ad['ad_status']
                         db_post_date = existing_ad['post_date']
                         if isinstance(db_post_date, str):
-                             try: db_post_date = parse_date(db_post_date)
+                             try: db_post_date = _parse_post_date(db_post_date)
                              except: pass
 
+                        # Changed columns are written together in one UPDATE below
+                        changes: dict[str, Any] = {}
+
                         # 1. PRICE CHECK
                         if current_price != db_price:
-                             await update_ad_price(ad_id, current_price)
+                             changes['current_price'] = current_price
                              consecutive_basic_unchanged = 0
                               
                         # 2. STATUS CHECK
-                        if ad_status != db_status:
-                             await update_ad_status(ad_id, ad_status)
-                             updated_ad = await get_ad(ad_id)
-                             updated_ad['old_status'] = db_status
-                             if notify_callback:
-                                 await notify_callback('status', updated_ad)
+                        status_changed = ad_status != db_status
+                        if status_changed:
+                             changes['ad_status'] = ad_status
                              consecutive_basic_unchanged = 0
 
                         # 3. REPOST CHECK (Only if date is visible)
@@ -348,66 +657,89 @@ class BazarakiScraper:
                             except TypeError: pass
                         
                         if is_repost:
-                             await update_ad_post_date(ad_id, current_post_date)
-                             updated_ad = await get_ad(ad_id)
-                             if notify_callback:
-                                 await notify_callback('repost', updated_ad)
+                             changes['post_date'] = current_post_date
                              consecutive_basic_unchanged = 0
+
+                        # Also refreshes last_checked, so an unchanged ad is just touched
+                        pending_updates.append((ad_id, changes))
+                        if changes:
+                            # Keep the prefetched row current in case the ad is listed again,
+                            # and reuse it for the notifications instead of re-reading the ad
+                            existing_ads[ad_id] = {**existing_ad, **changes}
+
+                        updated_ad = existing_ads[ad_id]
+                        if status_changed:
+                            pending_notifications.append(('status', {**updated_ad, 'old_status': db_status}))
+                        if is_repost:
+                            pending_notifications.append(('repost', updated_ad))
                         
                         # 4. UNCHANGED
-                        if current_price == db_price and ad_status == db_status and not is_repost:
-                            await touch_ad(ad_id)
-                            if ad_status == 'Basic':
-                                consecutive_basic_unchanged += 1
-                    
-                    
-                    if should_fetch_details:
-                        details = await self.fetch_ad_details(ad['ad_url'])
-                        if details:
-                            if details.get('ad_status_update'):
-                                ad_status = details['ad_status_update']
-
-                            if notification_type == 'new':
-                                full_ad_data: AdData = {
-                                    'ad_id': ad_id,
-                                    'ad_url': ad['ad_url'],
-                                    'first_seen': datetime.now(),
-                                    'post_date': details.get('post_date'),
-                                    'initial_price': current_price,
-                                    'current_price': current_price,
-                                    'car_brand': details.get('car_brand'),
-                                    'car_model': details.get('car_model'),
-                                    'car_year': details.get('car_year'),
-                                    'car_color': details.get('car_color'),
-                                    'gearbox': details.get('gearbox'),
-                                    'body_type': details.get('body_type'),
-                                    'fuel_type': details.get('fuel_type'),
-                                    'engine_size': details.get('engine_size'),
-                                    'drive_type': details.get('drive_type'),
-                                    'mileage': details.get('mileage'),
-                                    'user_name': details.get('user_name'),
-                                    'user_id': details.get('user_id'),
-                                    'is_business': details.get('is_business'),
-                                    'ad_status': ad_status
-                                }
-                                await add_ad(full_ad_data)
-                                new_ads_count += 1
-                                if notify_callback:
-                                    await notify_callback('new', full_ad_data)
-
-                        # Anti-ban delay ONLY if we fetched a page
+                        if not changes and ad_status == 'Basic':
+                            consecutive_basic_unchanged += 1
+
+                await upsert_ads_changes_bulk(pending_updates)
+                if notify_callback:
+                    for notification_type, updated_ad in pending_notifications:
+                        notify_tasks.append(asyncio.create_task(self._notify(notify_callback, notification_type, updated_ad)))
+
+                # Detail pages are fetched concurrently (bounded), each after its own anti-ban delay
+                sem = asyncio.Semaphore(DETAIL_FETCH_CONCURRENCY)
+
+                async def fetch_details(url: str) -> dict[str, Any] | None:
+                    async with sem:
                         await asyncio.sleep(random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX))
+                        return await self.fetch_ad_details(url)
+
+                details_list = await asyncio.gather(*(fetch_details(ad['ad_url']) for ad in to_fetch))
+                # Every new ad on the page shares one first-seen timestamp
+                page_seen = datetime.now()
+
+                for ad, details in zip(to_fetch, details_list):
+                    if not details:
+                        continue
+                    ad_status = details.get('ad_status_update') or ad['status']
+                    full_ad_data: AdData = {
+                        'ad_id': ad['ad_id'],
+                        'ad_url': ad['ad_url'],
+                        'first_seen': page_seen,
+                        'post_date': details.get('post_date'),
+                        'initial_price': ad['price'],
+                        'current_price': ad['price'],
+                        'car_brand': details.get('car_brand'),
+                        'car_model': details.get('car_model'),
+                        'car_year': details.get('car_year'),
+                        'car_color': details.get('car_color'),
+                        'gearbox': details.get('gearbox'),
+                        'body_type': details.get('body_type'),
+                        'fuel_type': details.get('fuel_type'),
+                        'engine_size': details.get('engine_size'),
+                        'drive_type': details.get('drive_type'),
+                        'mileage': details.get('mileage'),
+                        'user_name': details.get('user_name'),
+                        'user_id': details.get('user_id'),
+                        'is_business': details.get('is_business'),
+                        'ad_status': ad_status
+                    }
+                    new_ads.append(full_ad_data)
+                    new_ads_count += 1
+
+                await add_ads_bulk(new_ads)
+                if notify_callback:
+                    for full_ad_data in new_ads:
+                        notify_tasks.append(asyncio.create_task(self._notify(notify_callback, 'new', full_ad_data)))
                 
                 # Check stop condition
                 if consecutive_basic_unchanged >= MAX_CONSECUTIVE_UNCHANGED:
-                    logger.info(f"Stopping condition met: {consecutive_basic_unchanged} consecutive basic ads unchanged.")
+                    logger.info("Stopping condition met: %s consecutive basic ads unchanged.", consecutive_basic_unchanged)
                     break
                 
-                await asyncio.sleep(random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX))
                 page += 1
-                if page > MAX_PAGES_LIMIT:
-                    break
         finally:
+            # A prefetch still in its delay never reaches the site
+            if next_listing is not None:
+                next_listing.cancel()
+            # Notifications run alongside the scraping; the cycle only ends once they are all sent
+            await asyncio.gather(*notify_tasks)
             self.is_running = False
         
         return new_ads_count
@@ -423,7 +755,7 @@ class BazarakiScraper:
         if not followed_ids:
             return []
 
-        logger.info(f"Checking {len(followed_ids)} followed ads: {followed_ids}")
+        logger.info("Checking %s followed ads: %s", len(followed_ids), followed_ids)
         notifications = []
 
         for ad_id in followed_ids:
@@ -450,10 +782,9 @@ class BazarakiScraper:
                         await update_ad_status(ad_id, 'Disabled')
                         await add_history_entry(ad_id, 'active', 'True', 'False')
                         
-                        updated_ad = await get_ad(ad_id)
                         notifications.append({
                             'type': 'status_change',
-                            'ad': updated_ad,
+                            'ad': {**ad_data, 'ad_status': 'Disabled'},
                             'change': 'deactivated'
                         })
                     continue
@@ -462,7 +793,7 @@ class BazarakiScraper:
                     await update_follow_check_status(ad_id, reset_fail=True)
 
                 # Parse basic availability from text
-                soup = BeautifulSoup(html, 'lxml')
+                soup = await asyncio.to_thread(BeautifulSoup, html, 'lxml')
                 
                 # Check "Ad expired" / "Sold" / "Deleted"
                 # Bazaraki specific: "This ad has expired" or similar
@@ -476,25 +807,26 @@ class BazarakiScraper:
                 db_status = ad_data['ad_status']
                 db_post_date = ad_data['post_date']
                 if isinstance(db_post_date, str):
-                    try: db_post_date = parse_date(db_post_date)
+                    try: db_post_date = _parse_post_date(db_post_date)
                     except: pass
                 
-                # Parse New State
-                details = await self.fetch_ad_details(url)
+                # Parse New State (from the page already fetched above)
+                details = await asyncio.to_thread(self.parse_ad_details, html, url)
                 if not details: continue # Failed to parse details?
 
                 # 1. Active State Change
+                # Each write is mirrored into ad_data, so notifications don't re-read the ad
                 if not is_active and db_status != 'Disabled':
                     await update_ad_status(ad_id, 'Disabled')
                     await add_history_entry(ad_id, 'active', 'True', 'False')
-                    updated_ad = await get_ad(ad_id)
+                    ad_data = updated_ad = {**ad_data, 'ad_status': 'Disabled'}
                     notifications.append({'type': 'status_change', 'ad': updated_ad, 'change': 'deactivated'})
                     db_status = 'Disabled' # Update local var
                 
                 elif is_active and db_status == 'Disabled':
                     await update_ad_status(ad_id, 'Basic') # Assume basic upon reactivation unless vip/top found
                     await add_history_entry(ad_id, 'active', 'False', 'True')
-                    updated_ad = await get_ad(ad_id)
+                    ad_data = updated_ad = {**ad_data, 'ad_status': 'Basic'}
                     notifications.append({'type': 'status_change', 'ad': updated_ad, 'change': 'activated'})
                     db_status = 'Basic'
 
@@ -511,10 +843,10 @@ class BazarakiScraper:
                     if price and price != db_price:
                         await update_ad_price(ad_id, price)
                         await add_history_entry(ad_id, 'price', db_price, price)
-                        updated_ad = await get_ad(ad_id)
+                        ad_data = updated_ad = {**ad_data, 'current_price': price}
                         notifications.append({'type': 'price_change', 'ad': updated_ad, 'change': f"{db_price} > {price}"})
                 except Exception as e:
-                    logger.error(f"Error checking price for {ad_id}: {e}")
+                    logger.error("Error checking price for %s: %s", ad_id, e)
 
                 # 3. Status Change (VIP/TOP)
                 # fetch_ad_details returns 'ad_status_update' if found
@@ -523,7 +855,7 @@ class BazarakiScraper:
                 if current_status != db_status and current_status in ['VIP', 'TOP']:
                      await update_ad_status(ad_id, current_status)
                      await add_history_entry(ad_id, 'status', db_status, current_status)
-                     updated_ad = await get_ad(ad_id)
+                     ad_data = updated_ad = {**ad_data, 'ad_status': current_status}
                      notifications.append({'type': 'status_change', 'ad': updated_ad, 'change': f"{db_status} > {current_status}"})
                 
                 # 4. Repost Check
@@ -533,13 +865,13 @@ class BazarakiScraper:
                         if current_post_date > db_post_date:
                             await update_ad_post_date(ad_id, current_post_date)
                             await add_history_entry(ad_id, 'repost', str(db_post_date), str(current_post_date))
-                            updated_ad = await get_ad(ad_id)
+                            ad_data = updated_ad = {**ad_data, 'post_date': current_post_date}
                             notifications.append({'type': 'repost', 'ad': updated_ad, 'change': 'reposted'})
                     except: pass
                 
                 await asyncio.sleep(random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX))
 
             except Exception as e:
-                logger.error(f"Error checking followed ad {ad_id}: {e}")
+                logger.error("Error checking followed ad %s: %s", ad_id, e)
         
         return notifications
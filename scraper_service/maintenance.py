@@ -1,16 +1,38 @@
 import logging
 import asyncio
 import random
+import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any
 
 from shared.constants import REQUEST_DELAY_MIN, REQUEST_DELAY_MAX, SEARCH_URL
-from shared.database import get_ad, update_ad_color, add_ad
+from shared.database import get_ads_bulk, update_ad_color, add_ad
 from shared.utils import AdData
 from .logic import BazarakiScraper # Import the scraper class to use its fetch methods
 
 logger = logging.getLogger(__name__)
 
+# Ads whose detail page had no color, so rescans within the TTL don't fetch it again
+COLOR_RECHECK_TTL = 3600
+_COLORLESS_MAX = 5000
+_colorless_ads: OrderedDict[str, float] = OrderedDict()
+
+def _checked_recently(ad_id: str) -> bool:
+    checked_at = _colorless_ads.get(ad_id)
+    if checked_at is None:
+        return False
+    if time.monotonic() - checked_at < COLOR_RECHECK_TTL:
+        return True
+    del _colorless_ads[ad_id]
+    return False
+
+def _mark_colorless(ad_id: str) -> None:
+    _colorless_ads[ad_id] = time.monotonic()
+    _colorless_ads.move_to_end(ad_id)
+    while len(_colorless_ads) > _COLORLESS_MAX:
+        _colorless_ads.popitem(last=False)
+
 async def rescan_colors(scraper: BazarakiScraper, max_pages_limit: int = 100):
     """
     Scanning specifically to fill missing colors.
@@ -21,45 +43,50 @@ async def rescan_colors(scraper: BazarakiScraper, max_pages_limit: int = 100):
     page = 1
     updated_count = 0
     
-    logger.info(f"Starting COLOR RESCAN for {max_pages_limit} pages...")
+    logger.info("Starting COLOR RESCAN for %s pages...", max_pages_limit)
     
     try:
         while not scraper.stop_signal and page <= max_pages_limit:
             url = f"{SEARCH_URL}?page={page}"
-            logger.info(f"Rescan: Fetching {url}")
+            logger.info("Rescan: Fetching %s", url)
             
             html = await scraper.fetch_page(url)
             if not html:
                 break
                 
-            ads = scraper.parse_listing_page(html)
+            ads = await asyncio.to_thread(scraper.parse_listing_page, html)
             if not ads:
                 break
             
-            logger.info(f"Rescan Page {page}: Found {len(ads)} ads. checking for missing colors...")
+            logger.info("Rescan Page %s: Found %s ads. checking for missing colors...", page, len(ads))
+            # One query for every stored ad on the page
+            existing_ads = await get_ads_bulk([ad['ad_id'] for ad in ads])
                 
             for ad in ads:
                 if scraper.stop_signal:
                     break
                     
                 ad_id = ad['ad_id']
-                existing_ad = await get_ad(ad_id)
+                existing_ad = existing_ads.get(ad_id)
                 
                 if existing_ad:
                     # Check if color is missing
-                    if not existing_ad.get('car_color'):
-                        logger.info(f"Ad {ad_id} missing color. Fetching details...")
+                    if not existing_ad.get('car_color') and not _checked_recently(ad_id):
+                        logger.info("Ad %s missing color. Fetching details...", ad_id)
                         details = await scraper.fetch_ad_details(ad['ad_url'])
                         if details and details.get('car_color'):
                             await update_ad_color(ad_id, details['car_color'])
+                            existing_ad['car_color'] = details['car_color']
                             updated_count += 1
-                            logger.info(f"Updated Ad {ad_id} with color: {details['car_color']}")
+                            logger.info("Updated Ad %s with color: %s", ad_id, details['car_color'])
+                        elif details is not None:
+                            _mark_colorless(ad_id)
                         
                         # Delay after fetching details
                         await asyncio.sleep(random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX))
                 else:
                     # New ad found during rescan - we can add it completely
-                    logger.info(f"Ad {ad_id} is NEW (found during rescan). Adding...")
+                    logger.info("Ad %s is NEW (found during rescan). Adding...", ad_id)
                     details = await scraper.fetch_ad_details(ad['ad_url'])
                     if details:
                         # Construct AdData manually or helper
@@ -86,6 +113,8 @@ async def rescan_colors(scraper: BazarakiScraper, max_pages_limit: int = 100):
                             'ad_status': ad['status']
                         }
                         await add_ad(full_ad_data)
+                        # Listed twice on the page: the second sighting is an existing ad
+                        existing_ads[ad_id] = dict(full_ad_data)
                         updated_count += 1
                         
                     await asyncio.sleep(random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX))
@@ -95,4 +124,4 @@ async def rescan_colors(scraper: BazarakiScraper, max_pages_limit: int = 100):
             
     finally:
         scraper.is_running = False
-        logger.info(f"Rescan complete. Updated/Added {updated_count} ads.")
+        logger.info("Rescan complete. Updated/Added %s ads.", updated_count)
@@ -1,7 +1,7 @@
 
 import asyncio
 import logging
-from shared.database import init_db, update_ad_business
+from shared.database import init_db, update_ad_business, close_db
 from shared.config import LOG_DIR
 import sys
 
@@ -23,9 +23,10 @@ async def main():
     await init_db()
     
     for ad_id in ADS_TO_FIX:
-        logger.info(f"Setting is_business=True for Ad {ad_id}")
+        logger.info("Setting is_business=True for Ad %s", ad_id)
         await update_ad_business(ad_id, True)
     
+    await close_db()
     logger.info("Done.")
 
 if __name__ == "__main__":
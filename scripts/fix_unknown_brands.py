@@ -1,9 +1,8 @@
 import asyncio
-import aiosqlite
 import logging
 import random
 from scraper_service.logic import BazarakiScraper
-from shared.config import DATABASE_PATH
+from shared.database import connect_db
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -12,18 +11,18 @@ logger = logging.getLogger(__name__)
 async def fix_unknowns():
     scraper = BazarakiScraper()
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with connect_db() as db:
         # Find all target ads
         query = "SELECT ad_id, ad_url FROM ads WHERE car_brand IS NULL OR car_brand = 'Unknown' OR car_brand = ''"
         async with db.execute(query) as cursor:
             rows = await cursor.fetchall()
             
-        logger.info(f"Found {len(rows)} ads with Unknown/Missing Brand. Starting rescan...")
+        logger.info("Found %s ads with Unknown/Missing Brand. Starting rescan...", len(rows))
         
         updated_count = 0
         
         for i, (ad_id, url) in enumerate(rows):
-            logger.info(f"[{i+1}/{len(rows)}] Rescanning {url}...")
+            logger.info("[%s/%s] Rescanning %s...", i+1, len(rows), url)
             
             # Fetch details
             details = await scraper.fetch_ad_details(url)
@@ -39,14 +38,15 @@ async def fix_unknowns():
                 )
                 await db.commit()
                 updated_count += 1
-                logger.info(f"  ✅ Fixed: {brand} {model}")
+                logger.info("  ✅ Fixed: %s %s", brand, model)
             else:
-                logger.warning(f"  ❌ Still failed to extract brand for {url}")
+                logger.warning("  ❌ Still failed to extract brand for %s", url)
             
             # Sleep specifically to be nice
             await asyncio.sleep(random.uniform(1.5, 3.0))
             
-        logger.info(f"Remediation Complete. Fixed {updated_count}/{len(rows)} ads.")
+        logger.info("Remediation Complete. Fixed %s/%s ads.", updated_count, len(rows))
+    await scraper.close()
 
 if __name__ == "__main__":
     asyncio.run(fix_unknowns())
@@ -7,8 +7,7 @@ from shared.config import SEARCH_URL
 # Configure logging to stdout
 logging.basicConfig(level=logging.INFO, stream=sys.stdout)
 
-async def verify():
-    scraper = BazarakiScraper()
+async def verify(scraper: BazarakiScraper):
     print(f"Fetching from: {SEARCH_URL}")
     
     # 1. Fetch Listing Page
@@ -44,5 +43,12 @@ async def verify():
     else:
         print("❌ Failed to fetch details.")
 
+async def main():
+    scraper = BazarakiScraper()
+    try:
+        await verify(scraper)
+    finally:
+        await scraper.close()
+
 if __name__ == "__main__":
-    asyncio.run(verify())
+    asyncio.run(main())
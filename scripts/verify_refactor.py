@@ -12,7 +12,7 @@ async def verify():
     print("1. Importing shared modules...")
     try:
         from shared.config import DATABASE_PATH
-        from shared.database import init_db
+        from shared.database import init_db, close_db
         from shared.utils import is_match
         print(f"   Success. DB Path: {DATABASE_PATH}")
     except ImportError as e:
@@ -47,6 +47,7 @@ async def verify():
     print("5. Initializing Database...")
     try:
         await init_db()
+        await close_db()
         print("   Success. DB Initialized.")
     except Exception as e:
         print(f"   FAILED: {e}")
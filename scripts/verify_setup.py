@@ -1,6 +1,6 @@
 import asyncio
 import logging
-from shared.database import init_db, add_ad, get_ad
+from shared.database import init_db, add_ad, get_ad, close_db
 from datetime import datetime
 
 # Configure logging
@@ -35,6 +35,7 @@ async def test_database():
     
     await add_ad(test_ad)
     fetched = await get_ad('test_123')
+    await close_db()
     
     if fetched and fetched['car_brand'] == 'TestBrand':
         logger.info("✅ Database Test Passed: Ad inserted and retrieved.")
@@ -0,0 +1,120 @@
+import aiosqlite
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, List, Optional, Dict
+
+# Local imports
+from .config import ACTIVITY_DATABASE_PATH, DATABASE_PATH
+
+logger = logging.getLogger(__name__)
+
+# User activity logs are write-heavy and expendable, so they live in their own
+# SQLite file with fsync disabled. The main ads DB keeps its durability settings.
+_conn: Optional[aiosqlite.Connection] = None
+_conn_lock = asyncio.Lock()
+
+async def _connection() -> aiosqlite.Connection:
+    """Return the shared activity DB connection, opening and initializing it on first use."""
+    global _conn
+    if _conn is not None:
+        return _conn
+    async with _conn_lock:
+        if _conn is None:
+            conn = await aiosqlite.connect(ACTIVITY_DATABASE_PATH)
+            conn.row_factory = aiosqlite.Row
+            # Also covers the main DB while it is attached for the legacy import
+            await conn.execute("PRAGMA busy_timeout=5000")
+            await conn.execute("PRAGMA synchronous=OFF")
+            await conn.execute("PRAGMA journal_mode=MEMORY")
+            await conn.execute("PRAGMA temp_store=MEMORY")
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS user_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    action TEXT,
+                    timestamp DATETIME
+                )
+            """)
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_user_logs_user ON user_logs(user_id, timestamp)")
+            await _import_legacy_logs(conn)
+            await conn.commit()
+            _conn = conn
+    return _conn
+
+async def _import_legacy_logs(conn: aiosqlite.Connection) -> None:
+    """
+    One-time move of user_logs rows written to the main DB before the split.
+    The legacy table is dropped afterwards, so a recreated activity DB can't import them again.
+    """
+    await conn.execute("ATTACH DATABASE ? AS legacy", (str(DATABASE_PATH),))
+    try:
+        async with conn.execute("SELECT 1 FROM legacy.sqlite_master WHERE type = 'table' AND name = 'user_logs'") as cursor:
+            has_legacy = await cursor.fetchone()
+        if not has_legacy:
+            return
+        # Take the write locks up front: a read that later upgrades can't wait out a concurrent writer
+        await conn.execute("BEGIN IMMEDIATE")
+        async with conn.execute("SELECT 1 FROM user_logs LIMIT 1") as cursor:
+            # Rows already present: copied by a run that didn't drop the legacy table yet
+            already_imported = await cursor.fetchone()
+        if not already_imported:
+            await conn.execute(
+                "INSERT INTO user_logs (user_id, action, timestamp) "
+                "SELECT user_id, action, timestamp FROM legacy.user_logs ORDER BY id"
+            )
+            logger.info("Imported legacy user logs into the activity DB.")
+        await conn.execute("DROP TABLE legacy.user_logs")
+    finally:
+        await conn.commit()
+        await conn.execute("DETACH DATABASE legacy")
+
+async def init_activity_db() -> None:
+    """Open the activity DB and create its schema."""
+    await _connection()
+    logger.info("Activity database initialized.")
+
+async def close_activity_db() -> None:
+    global _conn
+    if _conn is not None:
+        await _conn.close()
+        _conn = None
+
+async def log_user_activities(entries: List[tuple[int, str, datetime]]) -> None:
+    """Log a batch of user activities (user_id, action, timestamp) in one transaction."""
+    db = await _connection()
+    await db.executemany(
+        "INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)",
+        entries
+    )
+    await db.commit()
+
+async def get_user_activities(user_id: int, limit: int = 50) -> List[dict[str, Any]]:
+    """Get recent activities for a user."""
+    db = await _connection()
+    async with db.execute(
+        "SELECT * FROM user_logs WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?",
+        (user_id, limit)
+    ) as cursor:
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+async def get_activity_summary(user_id: int) -> tuple[int, Optional[str]]:
+    """Get (total activities, last activity timestamp) for a user."""
+    db = await _connection()
+    async with db.execute("SELECT COUNT(*), MAX(timestamp) FROM user_logs WHERE user_id = ?", (user_id,)) as cursor:
+        row = await cursor.fetchone()
+        return (row[0], row[1]) if row else (0, None)
+
+async def get_last_active_times(user_ids: List[int]) -> Dict[int, str]:
+    """Get the last activity timestamp for each of the given users."""
+    if not user_ids:
+        return {}
+    db = await _connection()
+    placeholders = ", ".join("?" * len(user_ids))
+    async with db.execute(
+        f"SELECT user_id, MAX(timestamp) FROM user_logs WHERE user_id IN ({placeholders}) GROUP BY user_id",
+        tuple(user_ids)
+    ) as cursor:
+        rows = await cursor.fetchall()
+        return {row[0]: row[1] for row in rows}
@@ -22,5 +22,8 @@ USER_BOT_TOKEN = os.getenv("USER_BOT_TOKEN")
 BASE_DIR = Path(__file__).resolve().parent.parent
 # Database and logs stay in root or logs/
 DATABASE_PATH = BASE_DIR / "insightor.db"
+ACTIVITY_DATABASE_PATH = BASE_DIR / "activity.db"
+# Cloudflare clearance cookies, kept across restarts
+COOKIES_PATH = BASE_DIR / "cf_cookies.json"
 LOG_DIR = BASE_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
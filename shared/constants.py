@@ -12,6 +12,7 @@ REQUEST_DELAY_MIN = 2
 REQUEST_DELAY_MAX = 5
 MAX_CONSECUTIVE_UNCHANGED = 10  # Stop scraping after seeing this many unchanged basic ads
 MAX_PAGES_LIMIT = 20 # Safety limit (20 pages * 60 ads = 1200 ads)
+DETAIL_FETCH_CONCURRENCY = 4 # Parallel ad detail page fetches (each still waits a random delay)
 USER_AGENT_LIST = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
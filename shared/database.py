@@ -1,26 +1,193 @@
 import aiosqlite
 import asyncio
+import heapq
 import logging
 import json
+import sqlite3
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import TypedDict, Any, List, Optional, Dict
+from typing import TypedDict, Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Dict
 
 # Local imports
 from .config import DATABASE_PATH
-from .utils import is_match, AdData
+from .activity_db import get_activity_summary, get_last_active_times
+from .utils import AdData, compile_matcher
 
 logger = logging.getLogger(__name__)
 
-# Global lock for DB writes to prevent race conditions
-db_lock = asyncio.Lock()
+# Explicit datetime adapter (same format as sqlite3's deprecated default one)
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(" "))
+
+# Applied to every connection; journal_mode=WAL is persistent and set once in init_db
+_CONNECTION_PRAGMAS = (
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+)
+
+def _sql_str_method(method: Callable[[str], str]) -> Callable[[Any], Optional[str]]:
+    return lambda value: None if value is None else method(str(value))
+
+# Python's case mapping for filter SQL: SQLite's LOWER/UPPER/NOCASE only fold ASCII, unlike is_match
+_SQL_FUNCTIONS = (
+    ("py_lower", _sql_str_method(str.lower)),
+    ("py_upper", _sql_str_method(str.upper)),
+    ("py_strip", _sql_str_method(str.strip)),
+)
+
+async def _open_connection(*extra_pragmas: str) -> aiosqlite.Connection:
+    # Room for the static queries plus the generated filter/update variants
+    db = await aiosqlite.connect(DATABASE_PATH, cached_statements=256)
+    db.row_factory = aiosqlite.Row
+    for pragma in _CONNECTION_PRAGMAS + extra_pragmas:
+        await db.execute(pragma)
+    for name, func in _SQL_FUNCTIONS:
+        await db.create_function(name, 1, func, deterministic=True)
+    return db
+
+class _ConnectionPool:
+    """Fixed-size pool of long-lived connections, opened on first demand."""
+
+    def __init__(self, size: int, *pragmas: str):
+        self._size = size
+        self._pragmas = pragmas
+        self._opened = 0
+        self._conns: List[aiosqlite.Connection] = []
+        self._idle: asyncio.Queue = asyncio.Queue()
+
+    async def _acquire(self) -> aiosqlite.Connection:
+        if self._idle.empty() and self._opened < self._size:
+            self._opened += 1
+            try:
+                db = await _open_connection(*self._pragmas)
+            except Exception:
+                self._opened -= 1
+                raise
+            self._conns.append(db)
+            return db
+        return await self._idle.get()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        db = await self._acquire()
+        try:
+            yield db
+        finally:
+            # Don't hand a half-finished transaction to the next caller
+            if db.in_transaction:
+                await db.rollback()
+            self._idle.put_nowait(db)
+
+    async def close(self) -> None:
+        for db in self._conns:
+            await db.close()
+        self._conns.clear()
+        self._opened = 0
+        self._idle = asyncio.Queue()
+
+# A single writer connection serializes all writes (SQLite allows one writer anyway),
+# so no Python-level lock is needed. Readers run alongside it under WAL.
+_write_pool = _ConnectionPool(1, "PRAGMA wal_autocheckpoint=400")
+_read_pool = _ConnectionPool(4, "PRAGMA query_only=true")
+
+async def checkpoint_wal() -> None:
+    """Fold the WAL back into the main DB file and truncate it."""
+    async with _write_pool.connection() as db:
+        await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+async def close_db() -> None:
+    """Close all pooled connections."""
+    await _write_pool.close()
+    await _read_pool.close()
+
+@asynccontextmanager
+async def connect_db() -> AsyncIterator[aiosqlite.Connection]:
+    """Open a standalone connection to the main DB (for scripts; the bot uses the pools)."""
+    db = await _open_connection()
+    try:
+        yield db
+    finally:
+        await db.close()
 
 class Stats(TypedDict):
     total_ads: int
     new_today: int
 
+async def _has_column(db: aiosqlite.Connection, table: str, column: str) -> bool:
+    async with db.execute(f"PRAGMA table_info({table})") as cursor:
+        return any(row[1] == column for row in await cursor.fetchall())
+
+async def _migrate_car_color(db: aiosqlite.Connection) -> None:
+    if not await _has_column(db, 'ads', 'car_color'):
+        await db.execute("ALTER TABLE ads ADD COLUMN car_color TEXT")
+
+async def _migrate_first_seen_epoch(db: aiosqlite.Connection) -> None:
+    if not await _has_column(db, 'ads', 'first_seen_epoch'):
+        await db.execute("ALTER TABLE ads ADD COLUMN first_seen_epoch INTEGER")
+    # Backfill from the local-time first_seen strings
+    await db.execute(
+        "UPDATE ads SET first_seen_epoch = CAST(strftime('%s', first_seen, 'utc') AS INTEGER) "
+        "WHERE first_seen_epoch IS NULL"
+    )
+
+async def _migrate_ads_indexes(db: aiosqlite.Connection) -> None:
+    # Indexes for recency-ordered match queries and the common filters
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_ads_last_checked ON ads(last_checked)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_ads_brand_price ON ads(car_brand COLLATE NOCASE, current_price)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_ads_year ON ads(car_year)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_ads_first_seen_epoch ON ads(first_seen_epoch)")
+
+async def _migrate_ads_stats(db: aiosqlite.Connection) -> None:
+    # Running ads total, kept up to date by triggers so stats don't need COUNT(*)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS ads_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total INTEGER NOT NULL
+        )
+    """)
+    await db.execute("INSERT OR IGNORE INTO ads_stats (id, total) SELECT 1, COUNT(*) FROM ads")
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS ads_stats_ai AFTER INSERT ON ads
+        BEGIN UPDATE ads_stats SET total = total + 1 WHERE id = 1; END
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS ads_stats_ad AFTER DELETE ON ads
+        BEGIN UPDATE ads_stats SET total = total - 1 WHERE id = 1; END
+    """)
+
+# Schema migrations, applied once each in order and tracked in PRAGMA user_version.
+# Steps must tolerate databases that predate versioning (user_version 0).
+_MIGRATIONS: List[tuple[int, Callable[[aiosqlite.Connection], Awaitable[None]]]] = [
+    (1, _migrate_car_color),
+    (2, _migrate_first_seen_epoch),
+    (3, _migrate_ads_indexes),
+    (4, _migrate_ads_stats),
+]
+
+async def _apply_migrations(db: aiosqlite.Connection) -> None:
+    """Bring the schema up to the latest version in a single transaction."""
+    await db.execute("BEGIN IMMEDIATE")
+    try:
+        # Read under the write lock so concurrent starters can't both migrate
+        async with db.execute("PRAGMA user_version") as cursor:
+            current = (await cursor.fetchone())[0]
+        for version, migrate in _MIGRATIONS:
+            if version > current:
+                await migrate(db)
+                current = version
+                logger.info("Applied schema migration %s.", version)
+        await db.execute(f"PRAGMA user_version = {current}")
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
 async def init_db() -> None:
     """Initialize the database and create tables if they don't exist."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _write_pool.connection() as db:
         await db.execute("PRAGMA journal_mode=WAL;")
         await db.commit()
         
@@ -46,7 +213,8 @@ async def init_db() -> None:
                 user_id TEXT,
                 is_business BOOLEAN,
                 ad_status TEXT,
-                last_checked DATETIME
+                last_checked DATETIME,
+                first_seen_epoch INTEGER
             )
         """)
         
@@ -97,77 +265,41 @@ async def init_db() -> None:
             )
         """)
         
-        # Migrations
-        try:
-            await db.execute("ALTER TABLE ads ADD COLUMN car_color TEXT")
-        except aiosqlite.OperationalError:
-            pass # Column already exists
-            
-
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS user_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                action TEXT,
-                timestamp DATETIME,
-                FOREIGN KEY(user_id) REFERENCES users(user_id)
-            )
-        """)
-        
         await db.commit()
+        await _apply_migrations(db)
     logger.info("Database initialized.")
 
 # --- USER LOGS & MANAGEMENT ---
 
-async def log_user_activity(user_id: int, action: str) -> None:
-    """Log user activity (message or callback)."""
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute(
-                "INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)",
-                (user_id, action, datetime.now())
-            )
-            await db.commit()
-
-async def get_user_activities(user_id: int, limit: int = 50) -> List[dict[str, Any]]:
-    """Get recent activities for a user."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute(
-            "SELECT * FROM user_logs WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?",
-            (user_id, limit)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
-
 async def get_all_users_paginated(limit: int = 10, offset: int = 0) -> List[dict[str, Any]]:
     """Get all users with basic stats for the list view."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        # Get users and count their alerts/favorites/activity
+    async with _read_pool.connection() as db:
+        # Get users and count their alerts/favorites
         query = """
             SELECT u.*, 
                    (SELECT COUNT(*) FROM alerts WHERE user_id = u.user_id) as total_alerts,
-                   (SELECT COUNT(*) FROM followed_ads WHERE user_id = u.user_id) as total_favorites,
-                   (SELECT MAX(timestamp) FROM user_logs WHERE user_id = u.user_id) as last_active
+                   (SELECT COUNT(*) FROM followed_ads WHERE user_id = u.user_id) as total_favorites
             FROM users u
             ORDER BY joined_date DESC
             LIMIT ? OFFSET ?
         """
         async with db.execute(query, (limit, offset)) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            users = [dict(row) for row in await cursor.fetchall()]
+    # Activity lives in its own DB
+    last_active = await get_last_active_times([u['user_id'] for u in users])
+    for u in users:
+        u['last_active'] = last_active.get(u['user_id'])
+    return users
 
 async def get_total_users_count() -> int:
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT COUNT(*) FROM users") as cursor:
             row = await cursor.fetchone()
             return row[0] if row else 0
 
 async def search_users(query: str) -> List[dict[str, Any]]:
     """Search users by ID or username."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read_pool.connection() as db:
         sql = """
             SELECT * FROM users 
             WHERE CAST(user_id AS TEXT) LIKE ? OR username LIKE ?
@@ -180,22 +312,20 @@ async def search_users(query: str) -> List[dict[str, Any]]:
 
 async def delete_all_user_data(user_id: int) -> None:
     """Clear all alerts and favorites for a user."""
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("DELETE FROM alerts WHERE user_id = ?", (user_id,))
-            await db.execute("DELETE FROM followed_ads WHERE user_id = ?", (user_id,))
-            await db.execute("UPDATE users SET active_alerts_count = 0 WHERE user_id = ?", (user_id,))
-            await db.commit()
+    async with _write_pool.connection() as db:
+        await db.execute("DELETE FROM alerts WHERE user_id = ?", (user_id,))
+        await db.execute("DELETE FROM followed_ads WHERE user_id = ?", (user_id,))
+        await db.execute("UPDATE users SET active_alerts_count = 0 WHERE user_id = ?", (user_id,))
+        await db.commit()
+    _alert_matchers.clear()
 
 async def get_user_stats(user_id: int) -> dict[str, Any]:
     """Get detailed stats for a specific user profile."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _read_pool.connection() as db:
         queries = {
             "alerts_active": "SELECT COUNT(*) FROM alerts WHERE user_id = ? AND is_active = 1",
             "alerts_inactive": "SELECT COUNT(*) FROM alerts WHERE user_id = ? AND is_active = 0",
             "favorites": "SELECT COUNT(*) FROM followed_ads WHERE user_id = ?",
-            "total_activities": "SELECT COUNT(*) FROM user_logs WHERE user_id = ?",
-            "last_active": "SELECT MAX(timestamp) FROM user_logs WHERE user_id = ?",
             # Assuming we had way to track bot messages to user, but we don't track that explicitly yet in DB.
             # We will return None for 'last_bot_message' for now or implement if needed.
         }
@@ -205,252 +335,449 @@ async def get_user_stats(user_id: int) -> dict[str, Any]:
             async with db.execute(sql, (user_id,)) as cursor:
                 row = await cursor.fetchone()
                 stats[key] = row[0] if row else 0
-                
-        return stats
+
+    stats["total_activities"], stats["last_active"] = await get_activity_summary(user_id)
+    return stats
 
 # --- ADS CRUD ---
 
+# Column order of the positional row built by _ad_row (last_checked and first_seen_epoch are appended)
+_AD_COLUMNS = (
+    'ad_id', 'ad_url', 'first_seen', 'post_date', 'initial_price', 'current_price',
+    'car_brand', 'car_model', 'car_year', 'car_color', 'gearbox', 'body_type', 'fuel_type',
+    'engine_size', 'drive_type', 'mileage', 'user_name', 'user_id', 'is_business',
+    'ad_status',
+)
+
+def _ad_row(ad_data: AdData) -> tuple:
+    """Flatten ad data into an insert row; a new ad's last_checked is its first_seen."""
+    first_seen = ad_data['first_seen']
+    epoch = int(first_seen.timestamp()) if isinstance(first_seen, datetime) else None
+    return tuple([ad_data.get(col) for col in _AD_COLUMNS] + [first_seen, epoch])
+
+# Hot-path statements, defined once so every call binds the exact same SQL text
+# (sqlite3 keys its per-connection statement cache on the string).
+_STMTS: Dict[str, str] = {
+    "insert_ad": (
+        f"INSERT OR IGNORE INTO ads ({', '.join(_AD_COLUMNS)}, last_checked, first_seen_epoch) "
+        f"VALUES ({', '.join('?' * (len(_AD_COLUMNS) + 2))})"
+    ),
+    "get_ad": "SELECT * FROM ads WHERE ad_id = ?",
+    "update_color": "UPDATE ads SET car_color = ? WHERE ad_id = ?",
+    "update_business": "UPDATE ads SET is_business = ? WHERE ad_id = ?",
+}
+
 async def add_ad(ad_data: AdData) -> None:
     """Insert a new ad into the database."""
-    params: Dict[str, Any] = dict(ad_data)
-    params['last_checked'] = params['first_seen']
-    params.setdefault('car_color', None)
-
-    query = """
-        INSERT OR IGNORE INTO ads (
-            ad_id, ad_url, first_seen, post_date, initial_price, current_price,
-            car_brand, car_model, car_year, car_color, gearbox, body_type, fuel_type,
-            engine_size, drive_type, mileage, user_name, user_id, is_business,
-            ad_status, last_checked
-        ) VALUES (
-            :ad_id, :ad_url, :first_seen, :post_date, :initial_price, :current_price,
-            :car_brand, :car_model, :car_year, :car_color, :gearbox, :body_type, :fuel_type,
-            :engine_size, :drive_type, :mileage, :user_name, :user_id, :is_business,
-            :ad_status, :last_checked
-        )
-    """
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute(query, params)
-            await db.commit()
+    await add_ads_bulk([ad_data])
+
+async def add_ads_bulk(ads: List[AdData]) -> None:
+    """Insert many new ads in a single transaction."""
+    if not ads:
+        return
+    async with _write_pool.connection() as db:
+        await db.execute("BEGIN IMMEDIATE")
+        await db.executemany(_STMTS["insert_ad"], [_ad_row(ad) for ad in ads])
+        await db.commit()
+    _picker_cache.clear()
 
 async def get_ad(ad_id: str) -> Optional[dict[str, Any]]:
     """Retrieve an ad by its ID."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM ads WHERE ad_id = ?", (ad_id,)) as cursor:
+    async with _read_pool.connection() as db:
+        async with db.execute(_STMTS["get_ad"], (ad_id,)) as cursor:
             row = await cursor.fetchone()
             return dict(row) if row else None
 
+async def get_ads_bulk(ad_ids: List[str]) -> Dict[str, dict[str, Any]]:
+    """Retrieve several ads in one query, keyed by ad_id (missing ids are simply absent)."""
+    ids = list(dict.fromkeys(ad_ids))
+    ads: Dict[str, dict[str, Any]] = {}
+    async with _read_pool.connection() as db:
+        # Chunked to stay well under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            async with db.execute(f"SELECT * FROM ads WHERE ad_id IN ({placeholders})", chunk) as cursor:
+                for row in await cursor.fetchall():
+                    ads[row['ad_id']] = dict(row)
+    return ads
+
+# Columns of an existing ad that the scraper may change
+_UPDATABLE_AD_COLUMNS = frozenset({'current_price', 'ad_status', 'post_date', 'car_color', 'is_business'})
+_ad_update_sql: Dict[tuple[str, ...], str] = {}
+
+def _ad_update_query(changes: Dict[str, Any]) -> tuple[tuple[str, ...], str]:
+    """Validated column order and UPDATE statement for a set of ad changes."""
+    unknown = changes.keys() - _UPDATABLE_AD_COLUMNS
+    if unknown:
+        raise ValueError(f"Cannot update ad columns: {', '.join(sorted(unknown))}")
+    columns = tuple(sorted(changes))
+    sql = _ad_update_sql.get(columns)
+    if sql is None:
+        assignments = [f"{col} = ?" for col in columns] + ["last_checked = datetime('now', 'localtime')"]
+        sql = _ad_update_sql[columns] = f"UPDATE ads SET {', '.join(assignments)} WHERE ad_id = ?"
+    return columns, sql
+
+async def upsert_ad_changes(ad_id: str, **changes: Any) -> None:
+    """
+    Write the changed columns of an existing ad in a single UPDATE.
+    last_checked is always refreshed, so calling it without changes just touches the ad.
+    """
+    columns, sql = _ad_update_query(changes)
+    async with _write_pool.connection() as db:
+        await db.execute(sql, (*(changes[col] for col in columns), ad_id))
+        await db.commit()
+
+async def upsert_ads_changes_bulk(updates: List[tuple[str, Dict[str, Any]]]) -> None:
+    """
+    Apply many (ad_id, changes) updates, as upsert_ad_changes would, in a single transaction.
+    Updates touching the same columns share one executemany.
+    """
+    if not updates:
+        return
+    batches: Dict[str, List[tuple[Any, ...]]] = {}
+    for ad_id, changes in updates:
+        columns, sql = _ad_update_query(changes)
+        batches.setdefault(sql, []).append((*(changes[col] for col in columns), ad_id))
+    async with _write_pool.connection() as db:
+        await db.execute("BEGIN IMMEDIATE")
+        for sql, rows in batches.items():
+            await db.executemany(sql, rows)
+        await db.commit()
+
 async def update_ad_price(ad_id: str, new_price: int) -> None:
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("""
-                UPDATE ads 
-                SET current_price = ?, last_checked = ? 
-                WHERE ad_id = ?
-            """, (new_price, datetime.now(), ad_id))
-            await db.commit()
+    await upsert_ad_changes(ad_id, current_price=new_price)
 
 async def update_ad_color(ad_id: str, color: str) -> None:
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("UPDATE ads SET car_color = ? WHERE ad_id = ?", (color, ad_id))
-            await db.commit()
+    async with _write_pool.connection() as db:
+        await db.execute(_STMTS["update_color"], (color, ad_id))
+        await db.commit()
+    _picker_cache.clear()
 
 async def update_ad_post_date(ad_id: str, new_post_date: datetime) -> None:
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("""
-                UPDATE ads 
-                SET post_date = ?, last_checked = ? 
-                WHERE ad_id = ?
-            """, (new_post_date, datetime.now(), ad_id))
-            await db.commit()
+    await upsert_ad_changes(ad_id, post_date=new_post_date)
 
 async def update_ad_status(ad_id: str, new_status: str) -> None:
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("""
-                UPDATE ads 
-                SET ad_status = ?, last_checked = ? 
-                WHERE ad_id = ?
-            """, (new_status, datetime.now(), ad_id))
-            await db.commit()
+    await upsert_ad_changes(ad_id, ad_status=new_status)
 
 async def touch_ad(ad_id: str) -> None:
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("UPDATE ads SET last_checked = ? WHERE ad_id = ?", (datetime.now(), ad_id))
-            await db.commit()
+    await upsert_ad_changes(ad_id)
 
 async def update_ad_business(ad_id: str, is_business: bool) -> None:
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("UPDATE ads SET is_business = ? WHERE ad_id = ?", (is_business, ad_id))
-            await db.commit()
+    async with _write_pool.connection() as db:
+        await db.execute(_STMTS["update_business"], (is_business, ad_id))
+        await db.commit()
 
-async def get_all_ads() -> List[dict[str, Any]]:
-    """Retrieve all ads usage for export."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM ads") as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+async def iter_all_ads(batch_size: int = 1000) -> AsyncIterator[aiosqlite.Row]:
+    """Stream every ad row (for export) without loading the table into memory."""
+    async with _read_pool.connection() as db:
+        # rowid order is insertion order and walks the table B-tree directly
+        async with db.execute("SELECT * FROM ads ORDER BY rowid") as cursor:
+            # Pull rows in chunks: iterating the cursor directly costs one thread hop per row
+            while rows := await cursor.fetchmany(batch_size):
+                for row in rows:
+                    yield row
 
 async def get_statistics() -> Stats:
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        async with db.execute("SELECT COUNT(*) FROM ads") as cursor:
-            row_total = await cursor.fetchone()
-            total = row_total[0] if row_total else 0
-        
-        async with db.execute("SELECT COUNT(*) FROM ads WHERE first_seen > date('now', '-1 day')") as cursor:
-            row_new = await cursor.fetchone()
-            new_today = row_new[0] if row_new else 0
+    # Both figures in one statement; scalar subqueries keep the index range scan for new_today
+    async with _read_pool.connection() as db:
+        async with db.execute(
+            "SELECT (SELECT total FROM ads_stats WHERE id = 1), "
+            "(SELECT COUNT(*) FROM ads WHERE first_seen_epoch > ?)",
+            (int(time.time()) - 86400,)
+        ) as cursor:
+            total, new_today = await cursor.fetchone()
             
-    return {"total_ads": total, "new_today": new_today}
+    return {"total_ads": total or 0, "new_today": new_today or 0}
 
 # --- SEARCH & MATCHING ---
 
-async def get_latest_matching_ads(filters: dict, limit: int = 10) -> List[dict[str, Any]]:
+# (filter key, column, operator) for numeric bounds that map directly onto an ads column
+_RANGE_FILTERS = (
+    ('year_min', 'car_year', '>='), ('year_max', 'car_year', '<='),
+    ('price_min', 'current_price', '>='), ('price_max', 'current_price', '<='),
+    ('mileage_min', 'mileage', '>='), ('mileage_max', 'mileage', '<='),
+    ('engine_min', 'engine_size', '>='), ('engine_max', 'engine_size', '<='),
+)
+
+# (column, filter key) for case-insensitive exact matches
+_TEXT_FILTERS = (
+    ('gearbox', 'gearbox'), ('fuel_type', 'fuel_type'), ('drive_type', 'drive_type'),
+    ('body_type', 'body_type'), ('car_color', 'color'), ('ad_status', 'ad_status'),
+)
+
+def compile_filters_to_sql(filters: dict) -> tuple[str, List[Any]]:
     """
-    Fetch recent ads and filter them in memory using helper logic.
-    Optimized to fetch only last checked ads.
+    Translate alert filters into a WHERE clause over ads with the same semantics as is_match.
+    Returns the clause and its parameters.
     """
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        # Fetching strictly by recency (last_checked) might miss older ads that just matched?
-        # But use case is "New Alert" or "Activate", usually we want recent market status.
-        cursor = await db.execute("SELECT * FROM ads ORDER BY last_checked DESC LIMIT 2000")
-        rows = await cursor.fetchall()
-        
-        matches = []
-        for row in rows:
-            ad = dict(row)
-            if is_match(ad, filters):
-                matches.append(ad)
-                if len(matches) >= limit:
-                    break
-        return matches
+    clauses: List[str] = []
+    params: List[Any] = []
+
+    if filters.get('brand'):
+        clauses.append("py_lower(car_brand) = ?")
+        params.append(filters['brand'].lower())
+
+    if filters.get('model'):
+        models = filters['model'] if isinstance(filters['model'], list) else [filters['model']]
+        clauses.append(f"py_lower(COALESCE(car_model, '')) IN ({', '.join('?' * len(models))})")
+        params.extend(str(m).lower() for m in models)
+
+    # is_match rejects ads with a missing/zero or non-numeric value when a bound is set
+    for key, column, op in _RANGE_FILTERS:
+        if filters.get(key):
+            clauses.append(f"typeof({column}) IN ('integer', 'real') AND {column} != 0 AND {column} {op} ?")
+            params.append(filters[key])
+
+    for column, key in _TEXT_FILTERS:
+        value = filters.get(key)
+        if not value:
+            continue
+        if column == 'ad_status' and str(value).upper() == "VIP+TOP":
+            clauses.append("py_upper(ad_status) IN ('VIP', 'TOP')")
+        else:
+            clauses.append(f"py_lower({column}) = ?")
+            params.append(str(value).lower())
+
+    if filters.get('is_business') is not None:
+        clauses.append("is_business = ?")
+        params.append(filters['is_business'])
+
+    if filters.get('target_user_id'):
+        clauses.append("py_lower(py_strip(user_id)) = ?")
+        params.append(str(filters['target_user_id']).strip().lower())
+
+    return " AND ".join(clauses) or "1", params
+
+async def get_latest_matching_ads(filters: dict, limit: int = 10) -> List[dict[str, Any]]:
+    """Fetch the most recently checked ads matching the filters."""
+    where, params = compile_filters_to_sql(filters)
+    async with _read_pool.connection() as db:
+        async with db.execute(
+            f"SELECT * FROM ads WHERE {where} ORDER BY last_checked DESC LIMIT ?", (*params, limit)
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+
+# Filter picker values only change at scraper cadence, so they are cached briefly.
+# Cleared whenever ads are inserted or recoloured.
+_PICKER_CACHE_TTL = 60.0
+_picker_cache: Dict[tuple, tuple[float, Any]] = {}
+
+def _picker_cache_get(key: tuple) -> Any:
+    hit = _picker_cache.get(key)
+    if hit and hit[0] > time.monotonic():
+        return hit[1]
+    return None
+
+def _picker_cache_put(key: tuple, value: Any) -> None:
+    _picker_cache[key] = (time.monotonic() + _PICKER_CACHE_TTL, value)
+
+# Columns the pickers may query; anything else is rejected before it reaches SQL
+_NUMERIC_COLS = frozenset({'car_year', 'current_price', 'mileage', 'engine_size'})
+_TEXT_COLS = frozenset({
+    'car_brand', 'car_model', 'gearbox', 'fuel_type', 'drive_type', 'body_type', 'car_color', 'ad_status',
+})
+
+def _min_max_query(column: str) -> str:
+    col_expr = f"CAST({column} AS INTEGER)" if column == "engine_size" else column
+    # Ensure we don't pick up garbage
+    return f"SELECT MIN({col_expr}), MAX({col_expr}) FROM ads WHERE {col_expr} IS NOT NULL AND {col_expr} > 0"
+
+_MIN_MAX_SQL = {col: _min_max_query(col) for col in _NUMERIC_COLS}
+_distinct_sql: Dict[tuple[str, Optional[str], bool], str] = {}
+
+def _distinct_query(column: str, filter_col: Optional[str], limited: bool) -> str:
+    """SQL for get_distinct_values, built once per column/filter/limit combination."""
+    key = (column, filter_col, limited)
+    query = _distinct_sql.get(key)
+    if query is None:
+        query = f"SELECT {column} FROM ads WHERE {column} IS NOT NULL AND {column} != ''"
+        if filter_col:
+            query += f" AND {filter_col} = ?"
+        if limited:
+            query += f" GROUP BY {column} ORDER BY COUNT(*) DESC, {column} ASC LIMIT ?"
+        else:
+            query += f" GROUP BY {column} ORDER BY {column} ASC"
+        _distinct_sql[key] = query
+    return query
 
 async def get_min_max_values(column: str) -> tuple[int, int]:
     """Get min and max values for a numeric column."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        col_expr = f"CAST({column} AS INTEGER)" if column == "engine_size" else column
-        # Ensure we don't pick up garbage
-        query = f"SELECT MIN({col_expr}), MAX({col_expr}) FROM ads WHERE {col_expr} IS NOT NULL AND {col_expr} > 0"
-        async with db.execute(query) as cursor:
+    if column not in _NUMERIC_COLS:
+        raise ValueError(f"Unsupported numeric column: {column}")
+    key = ('min_max', column)
+    cached = _picker_cache_get(key)
+    if cached is not None:
+        return cached
+    async with _read_pool.connection() as db:
+        async with db.execute(_MIN_MAX_SQL[column]) as cursor:
             row = await cursor.fetchone()
-            return (row[0] or 0, row[1] or 0) if row else (0, 0)
-
-async def get_distinct_values(column: str, filter_col: Optional[str] = None, filter_val: Optional[str] = None) -> List[str]:
-    """Get sorted distinct values for a text column."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        query = f"SELECT DISTINCT {column} FROM ads WHERE {column} IS NOT NULL AND {column} != ''"
-        args = []
-        if filter_col and filter_val:
-            query += f" AND {filter_col} = ?"
-            args.append(filter_val)
-        query += f" ORDER BY {column} ASC"
-        
+            result = (row[0] or 0, row[1] or 0) if row else (0, 0)
+    _picker_cache_put(key, result)
+    return result
+
+async def get_distinct_values(column: str, filter_col: Optional[str] = None, filter_val: Optional[str] = None,
+                              limit: Optional[int] = None) -> List[str]:
+    """
+    Get distinct values for a text column.
+    Sorted alphabetically, or with `limit` the most common values first.
+    """
+    if column not in _TEXT_COLS or (filter_col and filter_col not in _TEXT_COLS):
+        raise ValueError(f"Unsupported text column: {column}/{filter_col}")
+    key = ('distinct', column, filter_col, filter_val, limit)
+    cached = _picker_cache_get(key)
+    if cached is not None:
+        return list(cached)
+    filtered = bool(filter_col and filter_val)
+    args: List[Any] = []
+    if filtered:
+        args.append(filter_val)
+    if limit:
+        args.append(limit)
+    query = _distinct_query(column, filter_col if filtered else None, bool(limit))
+    async with _read_pool.connection() as db:
         async with db.execute(query, tuple(args)) as cursor:
             rows = await cursor.fetchall()
-            return [row[0] for row in rows]
+            values = [row[0] for row in rows]
+    _picker_cache_put(key, values)
+    return list(values)
 
 # --- USER & ALERTS ---
 
 async def add_or_update_user(user_id: int, username: Optional[str], first_name: Optional[str]) -> None:
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("""
-                INSERT INTO users (user_id, username, first_name, joined_date)
-                VALUES (?, ?, ?, ?)
-                ON CONFLICT(user_id) DO UPDATE SET
-                    username=excluded.username,
-                    first_name=excluded.first_name
-            """, (user_id, username, first_name, datetime.now()))
-            await db.commit()
+    async with _write_pool.connection() as db:
+        await db.execute("""
+            INSERT INTO users (user_id, username, first_name, joined_date)
+            VALUES (?, ?, ?, datetime('now', 'localtime'))
+            ON CONFLICT(user_id) DO UPDATE SET
+                username=excluded.username,
+                first_name=excluded.first_name
+        """, (user_id, username, first_name))
+        await db.commit()
 
 async def get_user(user_id: int) -> Optional[dict[str, Any]]:
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)) as cursor:
             row = await cursor.fetchone()
             return dict(row) if row else None
 
+def _encode_filters(filters: dict) -> str:
+    """Serialize alert filters as compact JSON (no whitespace between tokens)."""
+    return json.dumps(filters, separators=(',', ':'))
+
 async def create_alert(user_id: int, name: str, filters: dict) -> int:
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            cursor = await db.execute("INSERT INTO alerts (user_id, name, created_at, filters) VALUES (?, ?, ?, ?)",
-                           (user_id, name, datetime.now(), json.dumps(filters)))
-            alert_id = cursor.lastrowid
-            await db.execute("UPDATE users SET active_alerts_count = active_alerts_count + 1 WHERE user_id = ?", (user_id,))
-            await db.commit()
-            return alert_id
+    async with _write_pool.connection() as db:
+        cursor = await db.execute("INSERT INTO alerts (user_id, name, created_at, filters) VALUES (?, ?, datetime('now', 'localtime'), ?)",
+                       (user_id, name, _encode_filters(filters)))
+        alert_id = cursor.lastrowid
+        await db.execute("UPDATE users SET active_alerts_count = active_alerts_count + 1 WHERE user_id = ?", (user_id,))
+        await db.commit()
+        return alert_id
 
 async def get_user_alerts(user_id: int) -> List[dict[str, Any]]:
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT * FROM alerts WHERE user_id = ?", (user_id,)) as cursor:
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
 
 async def get_alert(alert_id: int) -> Optional[dict[str, Any]]:
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT * FROM alerts WHERE alert_id = ?", (alert_id,)) as cursor:
             row = await cursor.fetchone()
             return dict(row) if row else None
 
 async def delete_alert(alert_id: int, user_id: int) -> None:
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("DELETE FROM alerts WHERE alert_id = ? AND user_id = ?", (alert_id, user_id))
-            # Recalculate count to be safe
-            await db.execute("""
-                UPDATE users 
-                SET active_alerts_count = (SELECT COUNT(*) FROM alerts WHERE user_id = ? AND is_active = 1)
-                WHERE user_id = ?
-            """, (user_id, user_id))
-            await db.commit()
+    async with _write_pool.connection() as db:
+        await db.execute("DELETE FROM alerts WHERE alert_id = ? AND user_id = ?", (alert_id, user_id))
+        # Recalculate count to be safe
+        await db.execute("""
+            UPDATE users 
+            SET active_alerts_count = (SELECT COUNT(*) FROM alerts WHERE user_id = ? AND is_active = 1)
+            WHERE user_id = ?
+        """, (user_id, user_id))
+        await db.commit()
+    _alert_matchers.pop(alert_id, None)
 
 async def toggle_alert(alert_id: int, user_id: int, is_active: bool) -> None:
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("UPDATE alerts SET is_active = ? WHERE alert_id = ? AND user_id = ?", (is_active, alert_id, user_id))
-            # Update count
-            await db.execute("""
-                UPDATE users 
-                SET active_alerts_count = (SELECT COUNT(*) FROM alerts WHERE user_id = ? AND is_active = 1)
-                WHERE user_id = ?
-            """, (user_id, user_id))
-            await db.commit()
+    async with _write_pool.connection() as db:
+        await db.execute("UPDATE alerts SET is_active = ? WHERE alert_id = ? AND user_id = ?", (is_active, alert_id, user_id))
+        # Update count
+        await db.execute("""
+            UPDATE users 
+            SET active_alerts_count = (SELECT COUNT(*) FROM alerts WHERE user_id = ? AND is_active = 1)
+            WHERE user_id = ?
+        """, (user_id, user_id))
+        await db.commit()
+    _alert_matchers.pop(alert_id, None)
 
 async def update_alert(alert_id: int, user_id: int, filters: dict) -> None:
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("UPDATE alerts SET filters = ? WHERE alert_id = ? AND user_id = ?", 
-                             (json.dumps(filters), alert_id, user_id))
-            await db.commit()
+    async with _write_pool.connection() as db:
+        await db.execute("UPDATE alerts SET filters = ? WHERE alert_id = ? AND user_id = ?", 
+                         (_encode_filters(filters), alert_id, user_id))
+        await db.commit()
+    _alert_matchers.pop(alert_id, None)
 
 async def rename_alert(alert_id: int, user_id: int, new_name: str) -> None:
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("UPDATE alerts SET name = ? WHERE alert_id = ? AND user_id = ?", 
-                             (new_name, alert_id, user_id))
-            await db.commit()
+    async with _write_pool.connection() as db:
+        await db.execute("UPDATE alerts SET name = ? WHERE alert_id = ? AND user_id = ?", 
+                         (new_name, alert_id, user_id))
+        await db.commit()
+
+# Compiled filter predicates by alert_id, tagged with the filters text they were
+# built from so an edit made anywhere (even another process) is picked up
+_alert_matchers: Dict[int, tuple[str, Callable[[Dict[str, Any]], bool]]] = {}
+
+def get_alert_matcher(alert: dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+    """Get the compiled matcher for an alert row (see compile_matcher)."""
+    raw = alert['filters']
+    cached = _alert_matchers.get(alert['alert_id'])
+    if cached is not None and cached[0] == raw:
+        return cached[1]
+    try:
+        filters = json.loads(raw)
+    except (TypeError, ValueError):
+        filters = None
+    matcher = compile_matcher(filters) if isinstance(filters, dict) else (lambda ad: False)
+    _alert_matchers[alert['alert_id']] = (raw, matcher)
+    return matcher
+
+# Alerts bucketed by the lowercased brand they filter on (None: any brand),
+# each entry tagged with its position in the original alerts list
+AlertIndex = Dict[Optional[str], List[tuple[int, dict[str, Any]]]]
+
+def _alert_brand(alert: dict[str, Any]) -> Optional[str]:
+    try:
+        filters = json.loads(alert['filters'])
+    except (TypeError, ValueError):
+        return None
+    brand = filters.get('brand') if isinstance(filters, dict) else None
+    return brand.lower() if isinstance(brand, str) and brand else None
+
+def index_alerts(alerts: List[dict[str, Any]]) -> AlertIndex:
+    """Bucket alerts by brand so an ad is only checked against alerts that can match it."""
+    index: AlertIndex = {}
+    for position, alert in enumerate(alerts):
+        index.setdefault(_alert_brand(alert), []).append((position, alert))
+    return index
+
+def candidate_alerts(index: AlertIndex, ad: Dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Alerts for the ad's brand plus brand-less ones, in their original order (matchers still decide)."""
+    brand = (ad.get('car_brand') or '').lower()
+    buckets = [index.get(brand, []), index.get(None, [])]
+    for _, alert in heapq.merge(*buckets, key=lambda entry: entry[0]):
+        yield alert
 
 async def get_active_alerts() -> List[dict[str, Any]]:
     """Get all active alerts for the scraper loop."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT * FROM alerts WHERE is_active = 1") as cursor:
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
 
 async def get_active_alerts_count_by_user(user_id: int) -> int:
     """Get precise count of active alerts for a user."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT COUNT(*) FROM alerts WHERE user_id = ? AND is_active = 1", (user_id,)) as cursor:
             row = await cursor.fetchone()
             return row[0] if row else 0
@@ -462,79 +789,76 @@ async def follow_ad(user_id: int, ad_id: str) -> bool:
     Toggle follow status for an ad.
     Returns: True if now following, False if unfollowed.
     """
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            # Check if already following
-            async with db.execute("SELECT 1 FROM followed_ads WHERE user_id = ? AND ad_id = ?", (user_id, ad_id)) as cursor:
-                exists = await cursor.fetchone()
-            
-            if exists:
-                await db.execute("DELETE FROM followed_ads WHERE user_id = ? AND ad_id = ?", (user_id, ad_id))
-                await db.commit()
-                logger.info(f"User {user_id} unfollowed ad {ad_id}")
-                return False
-            else:
-                await db.execute(
-                    "INSERT INTO followed_ads (user_id, ad_id, created_at) VALUES (?, ?, ?)",
-                    (user_id, ad_id, datetime.now())
-                )
-                await db.commit()
-                return True
+    async with _write_pool.connection() as db:
+        # Check if already following
+        async with db.execute("SELECT 1 FROM followed_ads WHERE user_id = ? AND ad_id = ?", (user_id, ad_id)) as cursor:
+            exists = await cursor.fetchone()
+        
+        if exists:
+            await db.execute("DELETE FROM followed_ads WHERE user_id = ? AND ad_id = ?", (user_id, ad_id))
+            await db.commit()
+            logger.info("User %s unfollowed ad %s", user_id, ad_id)
+            return False
+        else:
+            await db.execute(
+                "INSERT INTO followed_ads (user_id, ad_id, created_at) VALUES (?, ?, datetime('now', 'localtime'))",
+                (user_id, ad_id)
+            )
+            await db.commit()
+            return True
 
 async def is_ad_followed_by_user(user_id: int, ad_id: str) -> bool:
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT 1 FROM followed_ads WHERE user_id = ? AND ad_id = ?", (user_id, ad_id)) as cursor:
             return bool(await cursor.fetchone())
 
 async def get_followed_ads() -> List[str]:
     """Get list of unique ad_ids that are being followed by at least one user."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT DISTINCT ad_id FROM followed_ads") as cursor:
             rows = await cursor.fetchall()
             return [row[0] for row in rows]
 
 async def get_ad_followers(ad_id: str) -> List[int]:
     """Get list of user_ids following a specific ad."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT user_id FROM followed_ads WHERE ad_id = ?", (ad_id,)) as cursor:
             rows = await cursor.fetchall()
             return [row[0] for row in rows]
 
 async def get_all_followed_ads_by_user(user_id: int) -> set[str]:
     """Get a set of all ad_ids followed by a specific user."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT ad_id FROM followed_ads WHERE user_id = ?", (user_id,)) as cursor:
             rows = await cursor.fetchall()
             return {row[0] for row in rows}
 
 async def update_follow_check_status(ad_id: str, increment_fail: bool = False, reset_fail: bool = False):
     """Update failed checks count for a followed ad."""
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            if reset_fail:
-                await db.execute("UPDATE followed_ads SET failed_checks_count = 0 WHERE ad_id = ?", (ad_id,))
-            elif increment_fail:
-                await db.execute("UPDATE followed_ads SET failed_checks_count = failed_checks_count + 1 WHERE ad_id = ?", (ad_id,))
-            await db.commit()
+    async with _write_pool.connection() as db:
+        if reset_fail:
+            await db.execute("UPDATE followed_ads SET failed_checks_count = 0 WHERE ad_id = ?", (ad_id,))
+        elif increment_fail:
+            await db.execute("UPDATE followed_ads SET failed_checks_count = failed_checks_count + 1 WHERE ad_id = ?", (ad_id,))
+        await db.commit()
 
 async def get_user_alerts_count(user_id: int) -> int:
     """Get total count of alerts (active or not) for a user."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT COUNT(*) FROM alerts WHERE user_id = ?", (user_id,)) as cursor:
             row = await cursor.fetchone()
             return row[0] if row else 0
 
 async def get_user_followed_ads_count(user_id: int) -> int:
     """Get count of ads followed by user."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT COUNT(*) FROM followed_ads WHERE user_id = ?", (user_id,)) as cursor:
             row = await cursor.fetchone()
             return row[0] if row else 0
 
 async def get_user_followed_ads_paginated(user_id: int, offset: int = 0, limit: int = 5) -> List[dict[str, Any]]:
     """Get followed ads for a user with pagination, joined with ad details."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read_pool.connection() as db:
         query = """
             SELECT a.*, f.created_at as followed_at 
             FROM followed_ads f
@@ -549,7 +873,7 @@ async def get_user_followed_ads_paginated(user_id: int, offset: int = 0, limit:
 
 async def get_ad_failed_checks(ad_id: str) -> int:
     """Get the max failed checks count for an ad (from any follower entry)."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _read_pool.connection() as db:
         async with db.execute("SELECT MAX(failed_checks_count) FROM followed_ads WHERE ad_id = ?", (ad_id,)) as cursor:
             row = await cursor.fetchone()
             return row[0] if row and row[0] is not None else 0
@@ -558,18 +882,16 @@ async def get_ad_failed_checks(ad_id: str) -> int:
 
 async def add_history_entry(ad_id: str, change_type: str, old_val: Any, new_val: Any):
     """Log a change to the ad history."""
-    async with db_lock:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute(
-                "INSERT INTO ad_history (ad_id, change_type, old_value, new_value, timestamp) VALUES (?, ?, ?, ?, ?)",
-                (ad_id, change_type, str(old_val), str(new_val), datetime.now())
-            )
-            await db.commit()
+    async with _write_pool.connection() as db:
+        await db.execute(
+            "INSERT INTO ad_history (ad_id, change_type, old_value, new_value, timestamp) VALUES (?, ?, ?, ?, datetime('now', 'localtime'))",
+            (ad_id, change_type, str(old_val), str(new_val))
+        )
+        await db.commit()
 
 async def get_ad_history(ad_id: str, limit: int = 50) -> List[dict[str, Any]]:
     """Retrieve history for an ad."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _read_pool.connection() as db:
         async with db.execute(
             "SELECT * FROM ad_history WHERE ad_id = ? ORDER BY timestamp DESC LIMIT ?", 
             (ad_id, limit)
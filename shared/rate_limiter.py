@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Sliding-window limiter: at most `max_calls` acquisitions per `period` seconds."""
+
+    def __init__(self, max_calls: int, period: float):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls: deque[float] = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # Waiters queue on the lock, so slots are handed out in FIFO order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._calls and self._calls[0] <= now - self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                await asyncio.sleep(self._calls[0] + self.period - now)
+
+class TelegramRateLimiter:
+    """
+    Pre-delays sends to stay inside Telegram's flood limits:
+    30 msg/s per bot overall, 1 msg/s per private chat, 20 msg/min per group or channel.
+    """
+
+    def __init__(self):
+        self._global = RateLimiter(30, 1.0)
+        self._chats: Dict[int, RateLimiter] = {}
+
+    def _chat_limiter(self, chat_id: int) -> RateLimiter:
+        limiter = self._chats.get(chat_id)
+        if limiter is None:
+            # Group, supergroup and channel ids are negative
+            limiter = RateLimiter(20, 60.0) if chat_id < 0 else RateLimiter(1, 1.0)
+            self._chats[chat_id] = limiter
+        return limiter
+
+    async def acquire(self, chat_id: int) -> None:
+        # Per-chat first so a busy chat doesn't hold a global slot while it waits
+        await self._chat_limiter(chat_id).acquire()
+        await self._global.acquire()
+
+# Telegram's limits apply per bot token, so each bot gets its own limiter
+_limiters: Dict[int, TelegramRateLimiter] = {}
+
+def get_limiter(bot: Bot) -> TelegramRateLimiter:
+    limiter = _limiters.get(bot.id)
+    if limiter is None:
+        limiter = _limiters[bot.id] = TelegramRateLimiter()
+    return limiter
+
+async def send_message(bot: Bot, chat_id: int, text: str, max_retries: int = 3,
+                       timeout: Optional[float] = None, **kwargs: Any):
+    """
+    bot.send_message behind the shared limiter, sleeping out any RetryAfter from Telegram.
+    `timeout` bounds each Telegram call only, not the wait for a limiter slot.
+    """
+    limiter = get_limiter(bot)
+    for attempt in range(max_retries + 1):
+        await limiter.acquire(chat_id)
+        try:
+            return await asyncio.wait_for(bot.send_message(chat_id, text, **kwargs), timeout)
+        except TelegramRetryAfter as e:
+            if attempt == max_retries:
+                raise
+            logger.warning("Flood control for chat %s, retrying in %ss", chat_id, e.retry_after)
+            await asyncio.sleep(e.retry_after)
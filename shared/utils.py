@@ -2,7 +2,8 @@ import logging
 import json
 import html
 from datetime import datetime, date
-from typing import TypedDict, Any, Dict, List, Optional, Union
+from functools import lru_cache
+from typing import TypedDict, Any, Callable, Dict, List, Optional, Union
 
 logger = logging.getLogger(__name__)
 
@@ -103,9 +104,86 @@ def is_match(ad: Union[AdData, Dict[str, Any]], filters: dict) -> bool:
 
         return True
     except Exception as e:
-        logger.error(f"Error matching ad: {e}")
+        logger.error("Error matching ad: %s", e)
         return False
 
+def _never_matches(ad: Union[AdData, Dict[str, Any]]) -> bool:
+    return False
+
+def compile_matcher(filters: dict) -> Callable[[Union[AdData, Dict[str, Any]]], bool]:
+    """
+    Precompile alert filters into a predicate equivalent to `is_match(ad, filters)`.
+    Only the filters that are actually set become checks, evaluated in is_match's order.
+    """
+    checks: List[Callable[[Dict[str, Any]], bool]] = []
+    try:
+        if filters.get('brand'):
+            f_brand = filters['brand'].lower()
+            checks.append(lambda ad: (ad.get('car_brand') or '').lower() == f_brand)
+
+        if filters.get('model'):
+            target_models = filters['model']
+            if isinstance(target_models, list):
+                targets_lower = [str(x).lower() for x in target_models]
+                checks.append(lambda ad: (ad.get('car_model') or '').lower() in targets_lower)
+            else:
+                target_model = str(target_models).lower()
+                checks.append(lambda ad: (ad.get('car_model') or '').lower() == target_model)
+
+        for key, field, is_min in (
+            ('year_min', 'car_year', True), ('year_max', 'car_year', False),
+            ('price_min', 'current_price', True), ('price_max', 'current_price', False),
+            ('mileage_min', 'mileage', True), ('mileage_max', 'mileage', False),
+        ):
+            bound = filters.get(key)
+            if not bound: continue
+            if is_min:
+                checks.append(lambda ad, f=field, b=bound: bool(ad.get(f)) and not ad[f] < b)
+            else:
+                checks.append(lambda ad, f=field, b=bound: bool(ad.get(f)) and not ad[f] > b)
+
+        for key, is_min in (('engine_min', True), ('engine_max', False)):
+            bound = filters.get(key)
+            if not bound: continue
+            def engine_check(ad, b=bound, is_min=is_min):
+                if not ad.get('engine_size'): return False
+                try: val = float(ad['engine_size'])
+                except: return False
+                return not (val < b if is_min else val > b)
+            checks.append(engine_check)
+
+        for field in ['gearbox', 'fuel_type', 'drive_type', 'body_type', 'car_color', 'ad_status']:
+            f_val = filters.get(field if field != 'car_color' else 'color')
+            if not f_val: continue
+            if field == 'ad_status' and str(f_val).upper() == "VIP+TOP":
+                checks.append(lambda ad: bool(ad.get('ad_status')) and str(ad['ad_status']).upper() in ("VIP", "TOP"))
+            else:
+                f_lower = str(f_val).lower()
+                checks.append(lambda ad, f=field, v=f_lower: bool(ad.get(f)) and str(ad[f]).lower() == v)
+
+        if filters.get('is_business') is not None:
+            f_business = filters['is_business']
+            checks.append(lambda ad: ad.get('is_business') == f_business)
+
+        if filters.get('target_user_id'):
+            target = str(filters['target_user_id']).strip().lower()
+            checks.append(lambda ad: str(ad.get('user_id', '')).strip().lower() == target)
+    except Exception as e:
+        # Filters is_match could never satisfy
+        logger.error("Error compiling alert filters: %s", e)
+        return _never_matches
+
+    def matcher(ad: Union[AdData, Dict[str, Any]]) -> bool:
+        try:
+            for check in checks:
+                if not check(ad): return False
+            return True
+        except Exception as e:
+            logger.error("Error matching ad: %s", e)
+            return False
+
+    return matcher
+
 def get_status_display(status: str) -> str:
     """Helper to get formatted status string."""
     status = status or 'Basic'
@@ -114,151 +192,193 @@ def get_status_display(status: str) -> str:
     elif status == 'VIP+TOP': return " 🌟 VIP 🔥 TOP"
     return ""
 
+# Every field the non-detailed messages read; their values form the cache key
+_MESSAGE_FIELDS = (
+    'ad_id', 'ad_url', 'car_brand', 'car_model', 'car_year', 'mileage', 'fuel_type', 'gearbox',
+    'engine_size', 'user_name', 'user_id', 'ad_status', 'current_price', 'old_status',
+)
+_MISSING = object()
+
+@lru_cache(maxsize=4096)
+def _format_ad_message_cached(projection: tuple, notification_type: str) -> Optional[str]:
+    ad_data = {k: v for k, v in zip(_MESSAGE_FIELDS, projection) if v is not _MISSING}
+    return _format_ad_message(ad_data, notification_type)
+
 def format_ad_message(ad_data: Union[AdData, Dict[str, Any]], notification_type: str = 'new', history: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
-    """Format ad data into a message string."""
+    """
+    Format ad data into a message string.
+    'new'/'status'/'repost' messages are memoized on the fields they are built from.
+    """
+    if notification_type == 'detailed':
+        return _format_ad_message(ad_data, notification_type, history)
+    projection = tuple(ad_data.get(k, _MISSING) for k in _MESSAGE_FIELDS)
     try:
-        brand = ad_data.get('car_brand', 'Unknown') or 'Unknown'
-        model = ad_data.get('car_model', '') or ''
-        year = ad_data.get('car_year', '') or ''
-        title = f"{brand} {model} {year}".strip()
-        
-        mileage = ad_data.get('mileage', 0)
-        mileage_str = f"{mileage:,} km" if mileage else "N/A"
-            
-        fuel = ad_data.get('fuel_type', 'N/A')
-        gear = ad_data.get('gearbox', 'N/A')
-        engine = ad_data.get('engine_size', 'N/A')
-        if isinstance(engine, int) or (isinstance(engine, str) and engine.isdigit()): 
-            engine = f"{engine} cc"
-
-        seller = ad_data.get('user_name', 'Unknown')
-        status = ad_data.get('ad_status', 'Basic')
-        
-        status_prefix = "🚗"
-        if status == 'VIP': status_prefix = "🌟 VIP"
-        elif status == 'TOP': status_prefix = "🔥 TOP"
-        
-        seller_id = ad_data.get('user_id', '')
-        seller_info = seller
-        if seller_id:
-            # Hash tag for clickable ID
-            seller_info += f" (#id{seller_id})"
-
-        msg_text = ""
-        ad_id_tag = f"#ad{ad_data.get('ad_id', '')}"
-        
-        if notification_type == 'new':
-            safe_title = html.escape(title)
-            safe_fuel = html.escape(fuel)
-            safe_gear = html.escape(gear)
-            safe_seller = html.escape(seller_info)
-            msg_text = (
-                f"{status_prefix} <a href=\"{ad_data['ad_url']}\">{safe_title}</a> {ad_id_tag}\n"
-                f"💰 <b>{ad_data['current_price']} €</b>  ⏱️ {mileage_str}\n"
-                f"⛽ {safe_fuel}  ⚙️ {safe_gear}  🧩 {engine}\n"
-                f"👤 {safe_seller}"
-            )
-        elif notification_type == 'status':
-            safe_title = html.escape(title)
-            old = ad_data.get('old_status', 'Basic')
-            msg_text = (
-                f"🆙 <b>Status Update</b> ({old} ➜ {status}) {ad_id_tag}\n"
-                f"<a href=\"{ad_data['ad_url']}\">{safe_title}</a>\n"
-                f"💰 {ad_data['current_price']} €"
-            )
-        elif notification_type == 'repost':
-            safe_brand = html.escape(brand)
-            safe_model = html.escape(model)
-            msg_text = (
-                f"🔄 <b>Ad Reposted!</b> {ad_id_tag}\n"
-                f"The ad was bumped to the top.\n"
-                f"🔗 <a href=\"{ad_data['ad_url']}\">{safe_brand} {safe_model}</a>"
-            )
-
-        elif notification_type == 'detailed':
-            safe_title = html.escape(title)
-            safe_fuel = html.escape(fuel)
-            safe_gear = html.escape(gear)
-            safe_seller = html.escape(seller)
-            
-            # Status visualization
-            status_display = get_status_display(status)
-
-            # Init Price
-            init_price = ad_data.get('initial_price', ad_data.get('current_price'))
-            
-            # First Seen
-            first_seen = ad_data.get('first_seen', 'N/A')
-            if isinstance(first_seen, datetime):
-                first_seen_str = first_seen.strftime("%Y-%m-%d %H:%M")
-            elif isinstance(first_seen, str):
-                try: 
-                    dt = datetime.fromisoformat(first_seen)
-                    first_seen_str = dt.strftime("%Y-%m-%d %H:%M")
-                except:
-                    first_seen_str = str(first_seen)
-            else:
-                first_seen_str = str(first_seen)
-
-            # Seller info
-            seller_str = f"👤 {safe_seller}"
-            if seller_id:
-                seller_str += f" #{seller_id}"
-            
-            if ad_data.get('is_business'):
-                seller_str += " (Business)"
-            else:
-                seller_str += " (Private)"
-
-            msg_text = (
-                f"ℹ️ <b>Details for Ad #ad{ad_data['ad_id']}</b>\n"
-                f"👀 First seen: {first_seen_str}\n\n"
-                f"🚗 <a href=\"{ad_data['ad_url']}\">{safe_title}</a>{status_display}\n"
-                f"💰 First seen price {init_price} €  ⏱️ {mileage_str}\n"
-                f"⛽ {safe_fuel}  ⚙️ {safe_gear}  🧩 {engine}\n"
-                f"{seller_str}\n\n"
-            )
-            
-            if not history:
-                 msg_text += "No tracked changes yet."
-            else:
-                 msg_text += "\n<b>History:</b>\n"
-                 # Format History: DD MMM HH:MM Event
-                 for entry in history[:50]:
-                     ts = entry['timestamp']
-                     if isinstance(ts, str):
-                         try:
-                             if '.' in ts: ts = datetime.strptime(ts, '%Y-%m-%d %H:%M:%S.%f')
-                             else: ts = datetime.strptime(ts, '%Y-%m-%d %H:%M:%S')
-                         except:
-                             pass
-                     if not isinstance(ts, datetime):
-                         ts_str = "?? ???"
-                     else:
-                         ts_str = ts.strftime("%d %b %H:%M")
- 
-                     ctype = entry['change_type']
-                     old = entry['old_value']
-                     new = entry['new_value']
-                     
-                     line = ""
-                     if ctype == 'first_seen':
-                         line = "First seen"
-                     elif ctype == 'price_change' or ctype == 'price':
-                         line = f"Price {old} > {new}"
-                     elif ctype == 'status_change' or ctype == 'status':
-                         line = f"{old} > {new}"
-                     elif ctype == 'repost':
-                         line = "Ad was reposted"
-                     elif ctype == 'active':
-                         if str(new).lower() == 'false': line = "⛔ Deactivated"
-                         else: line = "✅ Activated"
-                     else:
-                         line = f"{ctype} changed"
-                     
-                     msg_text += f"{ts_str} {line}\n"
-
-        return msg_text
+        return _format_ad_message_cached(projection, notification_type)
+    except TypeError: # Unhashable field value
+        return _format_ad_message(ad_data, notification_type, history)
+
+_STATUS_PREFIX = {'VIP': "🌟 VIP", 'TOP': "🔥 TOP"}
+
+def _ad_title(ad_data: Union[AdData, Dict[str, Any]]) -> str:
+    brand = ad_data.get('car_brand', 'Unknown') or 'Unknown'
+    model = ad_data.get('car_model', '') or ''
+    year = ad_data.get('car_year', '') or ''
+    return f"{brand} {model} {year}".strip()
+
+def _ad_specs(ad_data: Union[AdData, Dict[str, Any]]) -> tuple[str, Any, Any, Any]:
+    """(mileage, fuel, gearbox, engine) display values."""
+    mileage = ad_data.get('mileage', 0)
+    mileage_str = f"{mileage:,} km" if mileage else "N/A"
+
+    fuel = ad_data.get('fuel_type', 'N/A')
+    gear = ad_data.get('gearbox', 'N/A')
+    engine = ad_data.get('engine_size', 'N/A')
+    if isinstance(engine, int) or (isinstance(engine, str) and engine.isdigit()): 
+        engine = f"{engine} cc"
+    return mileage_str, fuel, gear, html.escape(str(engine))
+
+def _build_new(ad_data: Union[AdData, Dict[str, Any]], history: Optional[List[Dict[str, Any]]]) -> str:
+    mileage_str, fuel, gear, engine = _ad_specs(ad_data)
+    status_prefix = _STATUS_PREFIX.get(ad_data.get('ad_status', 'Basic'), "🚗")
+
+    seller_info = ad_data.get('user_name', 'Unknown')
+    seller_id = ad_data.get('user_id', '')
+    if seller_id:
+        # Hash tag for clickable ID
+        seller_info += f" (#id{seller_id})"
+
+    safe_title = html.escape(_ad_title(ad_data))
+    safe_fuel = html.escape(fuel)
+    safe_gear = html.escape(gear)
+    safe_seller = html.escape(seller_info)
+    return (
+        f"{status_prefix} <a href=\"{html.escape(ad_data['ad_url'])}\">{safe_title}</a> #ad{ad_data.get('ad_id', '')}\n"
+        f"💰 <b>{ad_data['current_price']} €</b>  ⏱️ {mileage_str}\n"
+        f"⛽ {safe_fuel}  ⚙️ {safe_gear}  🧩 {engine}\n"
+        f"👤 {safe_seller}"
+    )
+
+def _build_status(ad_data: Union[AdData, Dict[str, Any]], history: Optional[List[Dict[str, Any]]]) -> str:
+    safe_title = html.escape(_ad_title(ad_data))
+    status = html.escape(str(ad_data.get('ad_status', 'Basic')))
+    old = html.escape(str(ad_data.get('old_status', 'Basic')))
+    return (
+        f"🆙 <b>Status Update</b> ({old} ➜ {status}) #ad{ad_data.get('ad_id', '')}\n"
+        f"<a href=\"{html.escape(ad_data['ad_url'])}\">{safe_title}</a>\n"
+        f"💰 {ad_data['current_price']} €"
+    )
+
+def _build_repost(ad_data: Union[AdData, Dict[str, Any]], history: Optional[List[Dict[str, Any]]]) -> str:
+    safe_brand = html.escape(ad_data.get('car_brand', 'Unknown') or 'Unknown')
+    safe_model = html.escape(ad_data.get('car_model', '') or '')
+    return (
+        f"🔄 <b>Ad Reposted!</b> #ad{ad_data.get('ad_id', '')}\n"
+        f"The ad was bumped to the top.\n"
+        f"🔗 <a href=\"{html.escape(ad_data['ad_url'])}\">{safe_brand} {safe_model}</a>"
+    )
+
+def _format_history_entry(entry: Dict[str, Any]) -> str:
+    ts = entry['timestamp']
+    if isinstance(ts, str):
+        try:
+            if '.' in ts: ts = datetime.strptime(ts, '%Y-%m-%d %H:%M:%S.%f')
+            else: ts = datetime.strptime(ts, '%Y-%m-%d %H:%M:%S')
+        except:
+            pass
+    if not isinstance(ts, datetime):
+        ts_str = "?? ???"
+    else:
+        ts_str = ts.strftime("%d %b %H:%M")
+
+    ctype = entry['change_type']
+    old = entry['old_value']
+    new = entry['new_value']
+    
+    line = ""
+    if ctype == 'first_seen':
+        line = "First seen"
+    elif ctype == 'price_change' or ctype == 'price':
+        line = f"Price {old} > {new}"
+    elif ctype == 'status_change' or ctype == 'status':
+        line = f"{old} > {new}"
+    elif ctype == 'repost':
+        line = "Ad was reposted"
+    elif ctype == 'active':
+        if str(new).lower() == 'false': line = "⛔ Deactivated"
+        else: line = "✅ Activated"
+    else:
+        line = f"{ctype} changed"
+    
+    return f"{ts_str} {html.escape(line)}\n"
+
+def _build_detailed(ad_data: Union[AdData, Dict[str, Any]], history: Optional[List[Dict[str, Any]]]) -> str:
+    mileage_str, fuel, gear, engine = _ad_specs(ad_data)
+    safe_title = html.escape(_ad_title(ad_data))
+    safe_fuel = html.escape(fuel)
+    safe_gear = html.escape(gear)
+    safe_seller = html.escape(ad_data.get('user_name', 'Unknown'))
+    
+    # Status visualization
+    status_display = get_status_display(ad_data.get('ad_status', 'Basic'))
+
+    # Init Price
+    init_price = ad_data.get('initial_price', ad_data.get('current_price'))
+    
+    # First Seen
+    first_seen = ad_data.get('first_seen', 'N/A')
+    if isinstance(first_seen, datetime):
+        first_seen_str = first_seen.strftime("%Y-%m-%d %H:%M")
+    elif isinstance(first_seen, str):
+        try: 
+            dt = datetime.fromisoformat(first_seen)
+            first_seen_str = dt.strftime("%Y-%m-%d %H:%M")
+        except:
+            first_seen_str = str(first_seen)
+    else:
+        first_seen_str = str(first_seen)
+
+    # Seller info
+    seller_str = f"👤 {safe_seller}"
+    seller_id = ad_data.get('user_id', '')
+    if seller_id:
+        seller_str += f" #{html.escape(str(seller_id))}"
+    
+    if ad_data.get('is_business'):
+        seller_str += " (Business)"
+    else:
+        seller_str += " (Private)"
+
+    msg_text = (
+        f"ℹ️ <b>Details for Ad #ad{html.escape(str(ad_data['ad_id']))}</b>\n"
+        f"👀 First seen: {html.escape(first_seen_str)}\n\n"
+        f"🚗 <a href=\"{html.escape(ad_data['ad_url'])}\">{safe_title}</a>{status_display}\n"
+        f"💰 First seen price {html.escape(str(init_price))} €  ⏱️ {mileage_str}\n"
+        f"⛽ {safe_fuel}  ⚙️ {safe_gear}  🧩 {engine}\n"
+        f"{seller_str}\n\n"
+    )
+    
+    if not history:
+         msg_text += "No tracked changes yet."
+    else:
+         # Format History: DD MMM HH:MM Event
+         msg_text += "\n<b>History:</b>\n" + "".join(_format_history_entry(entry) for entry in history[:50])
+
+    return msg_text
+
+# Message builders by notification type; unknown types produce no message
+_BUILDERS: Dict[str, Callable[[Union[AdData, Dict[str, Any]], Optional[List[Dict[str, Any]]]], str]] = {
+    'new': _build_new,
+    'status': _build_status,
+    'repost': _build_repost,
+    'detailed': _build_detailed,
+}
+
+def _format_ad_message(ad_data: Union[AdData, Dict[str, Any]], notification_type: str = 'new', history: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
+    builder = _BUILDERS.get(notification_type)
+    if builder is None:
+        return ""
+    try:
+        return builder(ad_data, history)
     except Exception as e:
-        logger.error(f"Error formatting match msg: {e}")
+        logger.error("Error formatting match msg: %s", e)
         return None